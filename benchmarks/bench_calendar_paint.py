@@ -0,0 +1,83 @@
+# میکروبنچمارک زمان رسم یک صفحه کامل تقویم (۴۲ خانه) در هر فریم
+#   python benchmarks/bench_calendar_paint.py --frames 500
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jdatetime
+from PyQt6.QtCore import QDate, QRect, Qt
+from PyQt6.QtGui import QColor, QFont, QImage, QPainter
+from PyQt6.QtWidgets import QApplication
+
+from gui import JalaliCalendarWidget
+
+
+def grid_cells(calendar):
+    first = QDate(calendar.yearShown(), calendar.monthShown(), 1)
+    start = first.addDays(-((first.dayOfWeek() - calendar.firstDayOfWeek().value) % 7))
+    return [(QRect((i % 7) * 60, (i // 7) * 40, 60, 40), start.addDays(i)) for i in range(42)]
+
+
+def legacy_paint_cell(calendar, painter, rect, date):
+    # همان کاری که paintCell پیش از کش انجام می‌داد
+    jdate = jdatetime.date.fromgregorian(date=date.toPyDate())
+    painter.setFont(QFont("Vazir", 9))
+    text_color = QColor(200, 200, 200) if calendar.is_dark_mode else QColor(0, 0, 0)
+    painter.setPen(QColor(255, 0, 0) if date.dayOfWeek() == 5 else text_color)
+    painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, str(jdate.day))
+    if jdate.day == 1:
+        month_names = ["فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور",
+                       "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند"]
+        painter.setFont(QFont("Vazir", 7))
+        painter.drawText(rect.adjusted(2, 2, -2, -2),
+                         Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft,
+                         month_names[jdate.month - 1])
+
+
+def time_frames(frames, paint_frame):
+    image = QImage(420, 240, QImage.Format.Format_ARGB32)
+    painter = QPainter(image)
+    start = time.perf_counter()
+    for _ in range(frames):
+        paint_frame(painter)
+    elapsed = time.perf_counter() - start
+    painter.end()
+    return elapsed / frames * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    calendar = JalaliCalendarWidget()
+    cells = grid_cells(calendar)
+
+    def legacy(painter):
+        for rect, date in cells:
+            legacy_paint_cell(calendar, painter, rect, date)
+
+    def cold(painter):
+        calendar.date_cache.clear()
+        for rect, date in cells:
+            calendar.paintCell(painter, rect, date)
+
+    def cached(painter):
+        for rect, date in cells:
+            calendar.paintCell(painter, rect, date)
+
+    results = {name: time_frames(args.frames, func)
+               for name, func in (("legacy", legacy), ("cold", cold), ("cached", cached))}
+    for name, micros in results.items():
+        print(f"{name:>7}: {micros:9.1f} µs/frame")
+    print(f"speedup: {results['legacy'] / results['cached']:.2f}x")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
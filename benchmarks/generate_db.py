@@ -0,0 +1,83 @@
+# ساخت دیتابیس مصنوعی بزرگ برای بنچمارک‌ها
+#   python benchmarks/generate_db.py bench.db --rows 1000000 --years 10
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jdatetime
+
+from database import TodoRepository, archive_path
+from jalali import date_key
+
+# روزی که بیشترین تسک را دارد و بنچمارک بارگذاری روز روی آن اجرا می‌شود
+HEAVY_DAY = "1403-01-15"
+
+WORDS = ("خرید نان شیر میوه جلسه پروژه گزارش تماس ایمیل پرداخت قبض برق آب گاز اجاره بانک "
+         "ورزش باشگاه پیاده‌روی کتاب مطالعه درس تمرین امتحان دانشگاه کلاس دکتر دندانپزشک دارو "
+         "سفر بلیط هتل مشهد شیراز اصفهان تولد هدیه مهمانی خانه تعمیر ماشین بیمه تعویض روغن "
+         "کار مشتری قرارداد فاکتور حساب‌رسی برنامه‌ریزی طراحی کد بازبینی انتشار نسخه سرور پشتیبان").split()
+
+
+def random_text(rng, min_words, max_words):
+    return " ".join(rng.choices(WORDS, k=rng.randint(min_words, max_words)))
+
+
+def generate_rows(rows, years, seed, heavy_day_rows):
+    rng = random.Random(seed)
+    first = jdatetime.date(1404 - years, 1, 1).togregorian().toordinal()
+    last = jdatetime.date(1404, 12, 29).togregorian().toordinal()
+    days = [date_key(jdatetime.date.fromgregorian(date=date.fromordinal(ordinal)))
+            for ordinal in range(first, last + 1)]
+    for index in range(rows):
+        date_str = HEAVY_DAY if index < heavy_day_rows else rng.choice(days)
+        # بیشتر توضیحات کوتاه یا خالی‌اند و تعداد کمی متن طولانی چسبانده‌شده دارند
+        roll = rng.random()
+        if roll < 0.4:
+            description = ""
+        elif roll < 0.95:
+            description = random_text(rng, 5, 30)
+        else:
+            description = random_text(rng, 100, 400)
+        yield (date_str, random_text(rng, 2, 8), description, rng.randint(0, 2), int(rng.random() < 0.6), None)
+
+
+def generate(path, rows, years=5, seed=0, heavy_day_rows=2000, chunk_size=10000):
+    for base in (path, archive_path(path)):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(base + suffix):
+                os.remove(base + suffix)
+    repository = TodoRepository(path)
+    chunk = []
+    try:
+        for row in generate_rows(rows, years, seed, min(heavy_day_rows, rows)):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                repository.insert_many(chunk)
+                chunk = []
+        if chunk:
+            repository.insert_many(chunk)
+    finally:
+        repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--heavy-day-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    generate(args.path, args.rows, args.years, args.seed, args.heavy_day_rows)
+    print(f"{args.rows} rows in {time.perf_counter() - started:.1f}s -> {args.path}")
+
+
+if __name__ == "__main__":
+    main()
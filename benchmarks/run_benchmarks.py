@@ -0,0 +1,235 @@
+# مجموعه بنچمارک مسیرهای پرتکرار برنامه روی یک دیتابیس مصنوعی، با پلتفرم offscreen در Qt
+#   python benchmarks/run_benchmarks.py --rows 100000                  # مقایسه با baseline.json
+#   python benchmarks/run_benchmarks.py --rows 100000 --save-baseline  # ذخیره نتایج به عنوان baseline
+#   python benchmarks/run_benchmarks.py --repeat 5 --save-baseline     # میانه چند اجرای کامل (برای baseline)
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from PyQt6.QtCore import QDate, QT_VERSION_STR, Qt
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtWidgets import QApplication
+
+from bench_calendar_paint import grid_cells
+from generate_db import HEAVY_DAY, generate
+from gui import JULIAN_DAY_OFFSET, TodoApp
+from jalali import ordinal_from_key
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+
+def wait_until(app, predicate, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark step did not finish in time")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {"median_ms": statistics.median(ordered) * 1000,
+            "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            "runs": len(ordered)}
+
+
+def timed(runs, setup, action, done=None, app=None):
+    samples = []
+    for _ in range(runs):
+        setup()
+        started = time.perf_counter()
+        action()
+        if done is not None:
+            wait_until(app, done)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def run_suite(app, window, runs):
+    results = {}
+
+    # پیش از هر نمونه نوشتن، کوئری‌های پس‌زمینه نمونه قبلی تمام می‌شوند تا رقابت آن‌ها بر سر GIL
+    # نتیجه را پراکنده نکند (کلیک‌های کاربر هم با فاصله انسانی می‌آیند)
+    def settle():
+        window.executor.wait()
+        app.processEvents()
+
+    heavy_date = QDate.fromJulianDay(ordinal_from_key(HEAVY_DAY) + JULIAN_DAY_OFFSET)
+
+    # بارگذاری روز پرکار بدون کش (از کلیک تا پر شدن لیست)
+    def select_other_day():
+        window.calendar.setSelectedDate(heavy_date.addDays(-3))
+        wait_until(app, lambda: window.todo_model.date_str != HEAVY_DAY)
+        window.executor.wait()
+        window.day_cache.clear()
+
+    results["load_todos_heavy_day"] = timed(
+        runs, select_other_day, lambda: window.calendar.setSelectedDate(heavy_date),
+        lambda: window.todo_model.date_str == HEAVY_DAY, app)
+
+    # رسم یک صفحه کامل تقویم
+    cells = grid_cells(window.calendar)
+    image = QImage(420, 240, QImage.Format.Format_ARGB32)
+    painter = QPainter(image)
+
+    def paint_month():
+        for rect, date in cells:
+            window.calendar.paintCell(painter, rect, date)
+
+    results["calendar_paint_month"] = timed(runs * 5, lambda: None, paint_month)
+    painter.end()
+
+    # تاخیر نوشتن: افزودن و تغییر وضعیت تسک در روز پرکار
+    def add_one():
+        window.title_input.setText("بنچمارک افزودن")
+        window.add_todo()
+
+    existing_ids = {todo[0] for todo in window.todo_model.todos}
+    results["add_todo"] = timed(runs, settle, add_one)
+    added_ids = [todo[0] for todo in window.todo_model.todos if todo[0] not in existing_ids]
+    original_states = [(todo[0], todo[5]) for todo in window.todo_model.todos[:runs]]
+    todo_ids = [todo_id for todo_id, _ in original_states]
+    states = iter(Qt.CheckState.Checked.value if index % 2 else Qt.CheckState.Unchecked.value
+                  for index in range(runs))
+    ids = iter(todo_ids)
+
+    # تیک زدن تا پایان نوشتن در دیتابیس (صف نوشتن بلافاصله خالی می‌شود)؛ فقط اضافه شدن به صف زمانی ندارد
+    def toggle_one():
+        window.toggle_todo_status(next(ids), next(states))
+        window.writes.flush()
+
+    results["toggle_todo_status"] = timed(runs, settle, toggle_one)
+
+    # یک دسته تیک پشت‌سرهم (مثل کلیک‌های سریع کاربر در فاصله WRITE_DELAY_MS) با یک commit
+    def toggle_batch():
+        for todo_id, _ in original_states:
+            window.toggle_todo_status(todo_id, Qt.CheckState.Checked.value)
+        for todo_id, _ in original_states:
+            window.toggle_todo_status(todo_id, Qt.CheckState.Unchecked.value)
+        window.writes.flush()
+
+    results["flush_batch"] = timed(runs, settle, toggle_batch)
+    # دیتابیس به حالت قبل برمی‌گردد تا اجراهای بعدی روی همان داده اندازه‌گیری شوند
+    window.repository.delete_many(added_ids)
+    for todo_id, completed in original_states:
+        window.repository.set_completed(todo_id, completed)
+
+    # تعویض ماه: بار اول با کوئری تجمیعی، بار دوم از کش
+    def month_loaded():
+        page = (window.calendar.yearShown(), window.calendar.monthShown())
+        return page in window.day_counts_cache
+
+    def reset_months():
+        window.calendar.setCurrentPage(heavy_date.year(), heavy_date.month())
+        window.executor.wait()
+        app.processEvents()
+        window.day_counts_cache.clear()
+
+    results["month_switch_cold"] = timed(runs, reset_months, window.calendar.showNextMonth, month_loaded, app)
+    results["month_switch_cached"] = timed(runs, lambda: window.calendar.showPreviousMonth(),
+                                           window.calendar.showNextMonth, month_loaded, app)
+
+    # دستور کار کارهای عقب‌افتاده (پیمایش بازه‌ای روی ستون day، تا آخرین دسته)
+    def reset_agenda():
+        window.agenda_combo.setCurrentIndex(window.AGENDA_OFF)
+        window.executor.wait()
+        app.processEvents()
+
+    results["agenda_overdue"] = timed(runs, reset_agenda,
+                                      lambda: window.agenda_combo.setCurrentIndex(window.AGENDA_OVERDUE),
+                                      lambda: not window.executor.pending("agenda"), app)
+    return results
+
+
+def merge_results(suites):
+    # میانه نتایج چند اجرای کامل مجموعه، تا یک اجرای پرنوسان baseline را جابه‌جا نکند
+    return {name: {"median_ms": statistics.median(suite[name]["median_ms"] for suite in suites),
+                   "p95_ms": statistics.median(suite[name]["p95_ms"] for suite in suites),
+                   "runs": sum(suite[name]["runs"] for suite in suites)}
+            for name in suites[0]}
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    # نتیجه‌ای که هم بیش از threshold (نسبی) و هم بیش از min_delta_ms از baseline کندتر باشد پسرفت است؛
+    # حد مطلق جلوی هشدارهای کاذب در اندازه‌گیری‌های زیر یک میلی‌ثانیه را می‌گیرد
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            print(f"{name:>22}: {result['median_ms']:9.3f} ms  (no baseline)")
+            continue
+        ratio = result["median_ms"] / reference["median_ms"] if reference["median_ms"] else 1.0
+        slower = result["median_ms"] - reference["median_ms"]
+        flag = "REGRESSION" if ratio > 1 + threshold and slower > min_delta_ms else "ok"
+        print(f"{name:>22}: {result['median_ms']:9.3f} ms  baseline {reference['median_ms']:9.3f} ms  "
+              f"x{ratio:5.2f}  {flag}")
+        if flag != "ok":
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.path.join(BENCH_DIR, "bench.db"),
+                        help="دیتابیس مصنوعی؛ اگر وجود نداشته باشد یا --regenerate داده شود ساخته می‌شود")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--regenerate", action="store_true")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=1, help="تعداد اجرای کامل مجموعه؛ میانه آن‌ها گزارش می‌شود")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results.json"))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    if args.regenerate or not os.path.exists(args.db):
+        started = time.perf_counter()
+        generate(args.db, args.rows, args.years)
+        print(f"generated {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+    app = QApplication(sys.argv)
+    window = TodoApp(db_path=args.db)
+    window.show()
+    window.start()
+    wait_until(app, lambda: window.todo_model.date_str is not None)
+
+    results = merge_results([run_suite(app, window, args.runs) for _ in range(args.repeat)])
+    window.close()
+
+    report = {"meta": {"rows": args.rows, "years": args.years, "runs": args.runs, "repeat": args.repeat,
+                       "python": platform.python_version(), "qt": QT_VERSION_STR,
+                       "platform": platform.platform()},
+              "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("rows") != args.rows:
+            print("warning: baseline was recorded with a different row count")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    # کش با اندازه محدود؛ با پر شدن، قدیمی‌ترین آیتم استفاده‌نشده حذف می‌شود
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        # شمارنده‌ها برای تنظیم اندازه کش
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def peek(self, key, default=None):
+        # خواندن بدون تغییر ترتیب و شمارنده‌ها
+        return self._data.get(key, default)
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def items(self):
+        return list(self._data.items())
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'size': len(self._data), 'max_size': self.max_size,
+                'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,143 @@
+# رابط خط فرمان؛ فقط از ماژول‌های بدون Qt استفاده می‌کند تا در سرورها و cron سریع اجرا شود
+#   python main.py list [--date 1403-01-15]
+#   python main.py agenda [--month | --overdue] [--date 1403-01-15]
+#   python main.py add "عنوان" [--date ...] [--priority 0|1|2] [--description ...] [--repeat weekly | --due 14:30]
+#   python main.py complete 12 13 [--undo]
+#   python main.py delete 12 13
+#   python main.py import tasks.csv | export tasks.ics
+#   python main.py archive [--older-than 365]
+import argparse
+import sys
+
+COMMANDS = ('list', 'agenda', 'add', 'complete', 'delete', 'import', 'export', 'archive')
+
+PRIORITY_STARS = {2: "★★★", 1: "★★☆", 0: "★☆☆"}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='main.py', description="مدیریت کارها از خط فرمان")
+    parser.add_argument('--db', default='todos.db', help="مسیر فایل دیتابیس")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="نمایش کارهای یک روز")
+    list_parser.add_argument('--date', help="تاریخ شمسی به شکل YYYY-MM-DD (پیش‌فرض: امروز)")
+
+    agenda_parser = commands.add_parser('agenda', help="کارهای هفته یا ماه یک روز، یا کارهای عقب‌افتاده")
+    agenda_parser.add_argument('--date', help="تاریخ شمسی به شکل YYYY-MM-DD (پیش‌فرض: امروز)")
+    span = agenda_parser.add_mutually_exclusive_group()
+    span.add_argument('--month', action='store_true', help="کل ماه به جای هفته")
+    span.add_argument('--overdue', action='store_true', help="کارهای انجام‌نشده روزهای گذشته")
+
+    add_parser = commands.add_parser('add', help="افزودن کار")
+    add_parser.add_argument('title')
+    add_parser.add_argument('--date', help="تاریخ شمسی به شکل YYYY-MM-DD (پیش‌فرض: امروز)")
+    add_parser.add_argument('--description', default='')
+    add_parser.add_argument('--priority', type=int, choices=(0, 1, 2), default=0)
+    # همان recurrence.FREQUENCIES؛ اینجا import نمی‌شود تا ساخت parser سبک بماند
+    repeat_or_due = add_parser.add_mutually_exclusive_group()
+    repeat_or_due.add_argument('--repeat', choices=('daily', 'weekly', 'monthly', 'yearly'),
+                               help="تکرار از همان روز: هر روز، هر هفته، هر ماه شمسی یا هر سال")
+    repeat_or_due.add_argument('--due', metavar='HH:MM', help="زمان یادآوری در همان روز (در برنامه باز نمایش داده می‌شود)")
+
+    complete_parser = commands.add_parser('complete', help="علامت‌گذاری کارها به عنوان انجام‌شده")
+    complete_parser.add_argument('ids', type=int, nargs='+')
+    complete_parser.add_argument('--undo', action='store_true', help="برگرداندن به انجام‌نشده")
+
+    delete_parser = commands.add_parser('delete', help="حذف کارها")
+    delete_parser.add_argument('ids', type=int, nargs='+')
+
+    import_parser = commands.add_parser('import', help="درون‌ریزی از CSV، JSON Lines یا iCalendar")
+    import_parser.add_argument('path')
+
+    export_parser = commands.add_parser('export', help="برون‌بری به CSV، JSON Lines یا iCalendar")
+    export_parser.add_argument('path')
+
+    archive_parser = commands.add_parser('archive', help="انتقال کارهای انجام‌شده قدیمی به دیتابیس بایگانی")
+    # همان database.ARCHIVE_AGE_DAYS
+    archive_parser.add_argument('--older-than', type=int, default=365, metavar='DAYS',
+                                help="کارهای انجام‌شده قدیمی‌تر از این تعداد روز (پیش‌فرض: ۳۶۵)")
+    return parser
+
+
+def resolve_date(value):
+    from jalali import ordinal_from_key, today_key
+
+    if value is None:
+        return today_key()
+    try:
+        ordinal_from_key(value)
+    except ValueError:
+        raise SystemExit(f"تاریخ نامعتبر: {value}")
+    return value
+
+
+def resolve_due(date_str, value):
+    from jalali import timestamp_from_key
+
+    if value is None:
+        return None
+    try:
+        hour, minute = (int(part) for part in value.split(':'))
+        return timestamp_from_key(date_str, hour, minute)
+    except ValueError:
+        raise SystemExit(f"زمان نامعتبر: {value}")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command in ('import', 'export'):
+        import transfer
+
+        operation = transfer.import_file if args.command == 'import' else transfer.export_file
+        report = operation(args.path, args.db)
+        print(f"{report['rows']} rows in {report['seconds']:.2f}s "
+              f"({report['rows_per_second']:.0f} rows/s, {report['skipped']} skipped)")
+        return 0
+
+    from database import TodoRepository
+
+    repository = TodoRepository(args.db)
+    try:
+        if args.command == 'list':
+            for todo_id, _, title, _, priority, completed in repository.todos_for_date(resolve_date(args.date)):
+                print(f"{todo_id}\t[{'x' if completed else ' '}]\t{PRIORITY_STARS.get(priority, '☆☆☆')}\t{title}")
+        elif args.command == 'agenda':
+            from jalali import month_range, ordinal_from_key, week_range
+            import jdatetime
+
+            date_str = resolve_date(args.date)
+            if args.overdue:
+                batches = repository.overdue(ordinal_from_key(date_str))
+            else:
+                jdate = jdatetime.date(*(int(part) for part in date_str.split('-')))
+                batches = repository.iter_range(*(month_range(jdate) if args.month else week_range(jdate)))
+            for rows in batches:
+                for todo_id, todo_date, title, _, priority, completed in rows:
+                    print(f"{todo_id}\t{todo_date}\t[{'x' if completed else ' '}]\t"
+                          f"{PRIORITY_STARS.get(priority, '☆☆☆')}\t{title}")
+        elif args.command == 'add' and args.repeat:
+            rule_id = repository.add_recurrence(resolve_date(args.date), args.title, args.description,
+                                                args.priority, args.repeat)
+            print(f"rule {rule_id}")
+        elif args.command == 'add':
+            date_str = resolve_date(args.date)
+            print(repository.add_todo(date_str, args.title, args.description, args.priority,
+                                      resolve_due(date_str, args.due)))
+        elif args.command == 'complete':
+            repository.set_completed_many(args.ids, 0 if args.undo else 1)
+        elif args.command == 'delete':
+            repository.delete_many(args.ids)
+        elif args.command == 'archive':
+            report = repository.archive_completed(args.older_than)
+            print(f"{report['rows']} rows archived in {report['seconds']:.2f}s, "
+                  f"{report['bytes_reclaimed']} bytes reclaimed "
+                  f"(database {report['bytes_before']} -> {report['bytes_after']} bytes, "
+                  f"archive {report['archive_bytes']} bytes)")
+    finally:
+        repository.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,969 @@
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from functools import lru_cache
+from itertools import groupby, islice
+
+from jalali import key_from_ordinal, ordinal_from_key, time_from_timestamp, timestamp_from_key
+from persian_text import normalize, search_terms
+from recurrence import OccurrenceCache, occurrence_id, split_ids, split_occurrence_id
+from tracing import connection_factory
+
+DB_PATH = 'todos.db'
+
+# ستون‌های هر تسک به همان ترتیبی که رابط کاربری و انتقال فایل انتظار دارند (ستون day داخلی است)
+TODO_COLUMNS = 'id, date, title, description, priority, completed'
+# همان شکل برای لیست‌ها، بدون متن توضیحات (که ممکن است طولانی باشد)؛ توضیحات با get_description خوانده می‌شود
+LIST_COLUMNS = 'id, date, title, NULL, priority, completed'
+# ستون‌های انتقال فایل: همان ستون‌ها به علاوه زمان یادآوری
+TRANSFER_COLUMNS = TODO_COLUMNS + ', due'
+RULE_COLUMNS = 'id, title, description, priority, frequency, interval, start_day, end_day'
+EXCEPTION_COLUMNS = 'day, recurrence_id, completed, title, description, priority, moved_day, deleted'
+# کارهای انجام‌شده قدیمی‌تر از این تعداد روز بایگانی می‌شوند (مقدار پیش‌فرض)
+ARCHIVE_AGE_DAYS = 365
+# کنار دیتابیس اصلی: todos.db -> todos-archive.db
+ARCHIVE_SUFFIX = '-archive'
+
+# ستون‌هایی که apply_changes (صف نوشتن رابط کاربری) اجازه تغییرشان را دارد؛ due فقط برای ردیف‌های todos
+EDITABLE_COLUMNS = ('title', 'description', 'priority', 'completed', 'due')
+
+# شماره روز ویژه در change_log: تغییری که به روز مشخصی محدود نیست (مثل قانون‌های تکرار)
+ALL_DAYS = 0
+# ستون day ردیف‌هایی که تاریخشان قابل تبدیل نیست (شماره روزها از ۱ شروع می‌شوند)؛ با NULL فرق دارد تا
+# days_ready درست شود و پر کردن ستون day این ردیف‌ها را در هر اجرا دوباره پیمایش نکند
+UNKNOWN_DAY = 0
+
+
+def _log_change(day, condition=None):
+    # دستور ثبت تغییر یک روز در change_log برای تریگرها؛ هر روز یک ردیف دارد با آخرین شماره تغییر
+    where = f' WHERE {condition}' if condition else ''
+    return (f'INSERT INTO change_log (day, seq) SELECT {day}, (SELECT IFNULL(MAX(seq), 0) + 1 FROM change_log)'
+            f'{where} ON CONFLICT (day) DO UPDATE SET seq = excluded.seq;')
+
+
+# هر مهاجرت فقط یک بار و به ترتیب اجرا می‌شود و شماره آن در PRAGMA user_version ذخیره می‌شود.
+# مهاجرت‌های قبلی هرگز تغییر داده نمی‌شوند؛ برای تغییر ساختار یک مرحله جدید به انتهای لیست اضافه کنید.
+MIGRATIONS = [
+    # 1: جدول اصلی کارها (دیتابیس‌های قدیمی این جدول را از قبل دارند)
+    ['''CREATE TABLE IF NOT EXISTS todos
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+         date TEXT,
+         title TEXT,
+         description TEXT,
+         priority INTEGER,
+         completed INTEGER DEFAULT 0)'''],
+    # 2: ایندکس ترکیبی برای نمای روزانه و حذف بر اساس تاریخ
+    ['CREATE INDEX IF NOT EXISTS idx_todos_date ON todos (date, completed, priority)'],
+    # 3: جستجوی تمام‌متن روی نسخه یکسان‌شده عنوان و توضیحات (تابع normalize_fa در _connect ثبت می‌شود؛
+    # تریگرهای آن در مهاجرت ۹ جایگزین شده‌اند)
+    ['''CREATE VIRTUAL TABLE todos_fts USING fts5(title, description,
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')''',
+     '''INSERT INTO todos_fts (rowid, title, description)
+        SELECT id, normalize_fa(title), normalize_fa(description) FROM todos''',
+     '''CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+            INSERT INTO todos_fts (rowid, title, description)
+            VALUES (new.id, normalize_fa(new.title), normalize_fa(new.description));
+        END''',
+     '''CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+            DELETE FROM todos_fts WHERE rowid = old.id;
+        END''',
+     '''CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN
+            UPDATE todos_fts SET title = normalize_fa(new.title), description = normalize_fa(new.description)
+            WHERE rowid = new.id;
+        END'''],
+    # 4: شماره روز (مثل jalali.ordinal_from_key) برای کوئری‌های بازه‌ای. ردیف‌های قبلی در اینجا پر نمی‌شوند
+    # تا باز کردن دیتابیس‌های بزرگ معطل نشود؛ backfill_days آن‌ها را در دسته‌های کوچک پر می‌کند.
+    # ایندکس جزئی کارهای انجام‌نشده، جستجوی کارهای عقب‌افتاده را به یک پیمایش بازه‌ای تبدیل می‌کند
+    ['ALTER TABLE todos ADD COLUMN day INTEGER',
+     'CREATE INDEX idx_todos_day ON todos (day, completed)',
+     'CREATE INDEX idx_todos_open_day ON todos (day) WHERE completed = 0'],
+    # 5: کارهای تکرارشونده (recurrence.py). فقط قانون‌ها و استثناهای تکرارها ذخیره می‌شوند: انجام‌شدن،
+    # ویرایش، انتقال به روز دیگر یا حذف یک تکرار. ستون‌های NULL استثنا یعنی همان مقدار قانون
+    ['''CREATE TABLE recurrences
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+         title TEXT,
+         description TEXT,
+         priority INTEGER,
+         frequency TEXT NOT NULL,
+         interval INTEGER NOT NULL DEFAULT 1,
+         start_day INTEGER NOT NULL,
+         end_day INTEGER)''',
+     '''CREATE TABLE recurrence_exceptions
+        (day INTEGER NOT NULL,
+         recurrence_id INTEGER NOT NULL,
+         completed INTEGER,
+         title TEXT,
+         description TEXT,
+         priority INTEGER,
+         moved_day INTEGER,
+         deleted INTEGER NOT NULL DEFAULT 0,
+         PRIMARY KEY (day, recurrence_id)) WITHOUT ROWID''',
+     'CREATE INDEX idx_recurrence_exceptions_moved ON recurrence_exceptions (moved_day) '
+     'WHERE moved_day IS NOT NULL'],
+    # 6: ثبت روزهای تغییرکرده برای دیدن تغییرات برنامه‌های دیگری که همین فایل را باز کرده‌اند.
+    # اندازه جدول به تعداد روزها محدود است، نه تعداد تغییرات. به‌روزرسانی فقط ستون day (backfill_days) ثبت نمی‌شود.
+    # تریگرهای todos در مهاجرت ۱۰ جایگزین شده‌اند
+    ['CREATE TABLE change_log (day INTEGER PRIMARY KEY, seq INTEGER NOT NULL)',
+     'CREATE INDEX idx_change_log_seq ON change_log (seq)',
+     f'''CREATE TRIGGER todos_log_insert AFTER INSERT ON todos BEGIN
+            {_log_change(f'IFNULL(jalali_ordinal(new.date), {ALL_DAYS})')}
+        END''',
+     f'''CREATE TRIGGER todos_log_update AFTER UPDATE OF date, title, description, priority, completed ON todos BEGIN
+            {_log_change(f'IFNULL(jalali_ordinal(old.date), {ALL_DAYS})')}
+            {_log_change(f'IFNULL(jalali_ordinal(new.date), {ALL_DAYS})', 'new.date IS NOT old.date')}
+        END''',
+     f'''CREATE TRIGGER todos_log_delete AFTER DELETE ON todos BEGIN
+            {_log_change(f'IFNULL(jalali_ordinal(old.date), {ALL_DAYS})')}
+        END''',
+     *(f'''CREATE TRIGGER recurrences_log_{event} AFTER {event.upper()} ON recurrences BEGIN
+            {_log_change(ALL_DAYS)}
+        END''' for event in ('insert', 'update', 'delete')),
+     f'''CREATE TRIGGER recurrence_exceptions_log_insert AFTER INSERT ON recurrence_exceptions BEGIN
+            {_log_change('new.day')}
+            {_log_change('new.moved_day', 'new.moved_day IS NOT NULL')}
+        END''',
+     f'''CREATE TRIGGER recurrence_exceptions_log_update AFTER UPDATE ON recurrence_exceptions BEGIN
+            {_log_change('new.day')}
+            {_log_change('old.moved_day', 'old.moved_day IS NOT NULL')}
+            {_log_change('new.moved_day', 'new.moved_day IS NOT NULL')}
+        END''',
+     f'''CREATE TRIGGER recurrence_exceptions_log_delete AFTER DELETE ON recurrence_exceptions BEGIN
+            {_log_change('old.day')}
+            {_log_change('old.moved_day', 'old.moved_day IS NOT NULL')}
+        END'''],
+    # 7: صفحه‌بندی کارهای یک روز به ترتیب شناسه (keyset)؛ شناسه در انتهای هر ایندکس هست،
+    # بنابراین ترتیب این ایندکس (date, id) است
+    ['CREATE INDEX idx_todos_date_id ON todos (date)'],
+    # 8: زمان یادآوری (زمان یونیکس، NULL یعنی بدون یادآوری). ایندکس جزئی فقط یادآوری‌های کارهای انجام‌نشده
+    # را نگه می‌دارد تا نزدیک‌ترین‌ها بدون پیمایش کارهای آینده خوانده شوند. تغییر due هم در change_log ثبت می‌شود
+    ['ALTER TABLE todos ADD COLUMN due INTEGER',
+     'CREATE INDEX idx_todos_due ON todos (due) WHERE due IS NOT NULL AND completed = 0',
+     'DROP TRIGGER todos_log_update',
+     f'''CREATE TRIGGER todos_log_update AFTER UPDATE OF date, title, description, priority, completed, due
+        ON todos BEGIN
+            {_log_change(f'IFNULL(jalali_ordinal(old.date), {ALL_DAYS})')}
+            {_log_change(f'IFNULL(jalali_ordinal(new.date), {ALL_DAYS})', 'new.date IS NOT old.date')}
+        END'''],
+    # 9: تریگرهای جستجو دیگر تابع برنامه (normalize_fa) را صدا نمی‌زنند تا نوشتن در todos با
+    # ابزارهای خارجی (پوسته sqlite3، پشتیبان‌گیری) هم ممکن باشد. ردیف‌های درج‌شده یا ویرایش‌شده در
+    # todos_fts_pending ثبت می‌شوند و برنامه متن یکسان‌شده آن‌ها را پیش از commit هر نوشتن خود (و هنگام باز
+    # کردن دیتابیس برای نوشتن‌های ابزارهای خارجی) در todos_fts می‌نویسد
+    ['CREATE TABLE todos_fts_pending (id INTEGER PRIMARY KEY)',
+     'DROP TRIGGER todos_fts_insert',
+     'DROP TRIGGER todos_fts_update',
+     'DROP TRIGGER todos_fts_delete',
+     '''CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+            INSERT OR IGNORE INTO todos_fts_pending (id) VALUES (new.id);
+        END''',
+     '''CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN
+            INSERT OR IGNORE INTO todos_fts_pending (id) VALUES (new.id);
+        END''',
+     '''CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+            DELETE FROM todos_fts WHERE rowid = old.id;
+            DELETE FROM todos_fts_pending WHERE id = old.id;
+        END'''],
+    # 10: تریگرهای change_log روز را از ستون day می‌خوانند، نه با تابع برنامه jalali_ordinal، تا نوشتن با
+    # ابزارهای خارجی ممکن باشد. ردیف بدون day یا با تاریخ تغییرکرده و day قدیمی (نوشتن خارجی) همه روزها را
+    # تغییرکرده اعلام می‌کند
+    ['DROP TRIGGER todos_log_insert',
+     'DROP TRIGGER todos_log_update',
+     'DROP TRIGGER todos_log_delete',
+     f'''CREATE TRIGGER todos_log_insert AFTER INSERT ON todos BEGIN
+            {_log_change(f'IFNULL(NULLIF(new.day, {UNKNOWN_DAY}), {ALL_DAYS})')}
+        END''',
+     f'''CREATE TRIGGER todos_log_update AFTER UPDATE OF date, title, description, priority, completed, due
+        ON todos BEGIN
+            {_log_change(f'IFNULL(NULLIF(old.day, {UNKNOWN_DAY}), {ALL_DAYS})')}
+            {_log_change(f'CASE WHEN new.day IS old.day THEN {ALL_DAYS} '
+                         f'ELSE IFNULL(NULLIF(new.day, {UNKNOWN_DAY}), {ALL_DAYS}) END',
+                         'new.date IS NOT old.date')}
+        END''',
+     f'''CREATE TRIGGER todos_log_delete AFTER DELETE ON todos BEGIN
+            {_log_change(f'IFNULL(NULLIF(old.day, {UNKNOWN_DAY}), {ALL_DAYS})')}
+        END'''],
+]
+
+
+# مهاجرت‌های دیتابیس بایگانی (با نام archive به اتصال‌ها متصل می‌شود)؛ شماره در PRAGMA archive.user_version.
+# ردیف‌ها همان ستون‌های todos را دارند؛ متن جستجوی یکسان‌شده هنگام بایگانی از todos_fts کپی می‌شود
+ARCHIVE_MIGRATIONS = [
+    # 1: کارهای بایگانی‌شده و جستجوی تمام‌متن آن‌ها
+    ['''CREATE TABLE archive.todos
+        (id INTEGER PRIMARY KEY,
+         date TEXT,
+         title TEXT,
+         description TEXT,
+         priority INTEGER,
+         completed INTEGER DEFAULT 0,
+         day INTEGER)''',
+     'CREATE INDEX archive.idx_todos_day ON todos (day)',
+     '''CREATE VIRTUAL TABLE archive.todos_fts USING fts5(title, description,
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')'''],
+    # 2: زمان یادآوری (مهاجرت ۸ دیتابیس اصلی)
+    ['ALTER TABLE archive.todos ADD COLUMN due INTEGER'],
+]
+
+
+def _begin_immediate(conn):
+    # شروع تراکنش با قفل نوشتن (روی همه دیتابیس‌های متصل) پیش از اولین خواندن. در تراکنش معمولی (DEFERRED)
+    # اگر اتصال دیگری بین خواندن و اولین نوشتن commit کند، ارتقای قفل با database is locked (BUSY_SNAPSHOT)
+    # شکست می‌خورد و busy_timeout هم کمکی نمی‌کند. داخل تراکنش باز کاری انجام نمی‌دهد
+    if not conn.in_transaction:
+        conn.execute('BEGIN IMMEDIATE')
+
+
+def _index_pending(conn):
+    # نوشتن متن یکسان‌شده ردیف‌های ثبت‌شده در todos_fts_pending در todos_fts (داخل تراکنش فراخواننده)
+    if conn.execute('SELECT 1 FROM todos_fts_pending LIMIT 1').fetchone() is None:
+        return
+    conn.execute('DELETE FROM todos_fts WHERE rowid IN (SELECT id FROM todos_fts_pending)')
+    conn.execute('INSERT INTO todos_fts (rowid, title, description) '
+                 'SELECT id, normalize_fa(title), normalize_fa(description) FROM todos '
+                 'WHERE id IN (SELECT id FROM todos_fts_pending)')
+    conn.execute('DELETE FROM todos_fts_pending')
+
+
+def archive_path(path):
+    root, extension = os.path.splitext(path)
+    return f'{root}{ARCHIVE_SUFFIX}{extension or ".db"}'
+
+
+def _list_row(todo):
+    # ردیف تکرارها به شکل LIST_COLUMNS
+    return todo[:3] + (None,) + todo[4:]
+
+
+def _range_key(todo):
+    # کلید ترتیب فهرست‌های بازه‌ای (تاریخ، completed، شناسه)؛ کلیدهای YYYY-MM-DD به ترتیب روز مرتب‌اند
+    return todo[1], todo[5], todo[0]
+
+
+def _iter_rows(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+@lru_cache(maxsize=4096)
+def day_ordinal(date_str):
+    # مقدار ستون day برای یک کلید تاریخ؛ تاریخ نامعتبر NULL می‌ماند
+    try:
+        return ordinal_from_key(date_str)
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def stored_day(date_str):
+    # مقدار ذخیره‌شده در ستون day
+    day = day_ordinal(date_str)
+    return UNKNOWN_DAY if day is None else day
+
+
+def moved_due(due, date_str):
+    # زمان یادآوری در روز date_str با همان ساعت محلی قبلی؛ با جمع ثانیه‌ها، انتقال از روی تغییر ساعت
+    # تابستانی یادآوری را یک ساعت جابه‌جا می‌کرد
+    if due is None or day_ordinal(date_str) is None:
+        return due
+    return timestamp_from_key(date_str, *time_from_timestamp(due))
+
+
+@lru_cache(maxsize=4096)
+def day_date(day):
+    # کلید تاریخ شمسی یک شماره روز (برای تکرارها که فقط شماره روز دارند)
+    return key_from_ordinal(day)
+
+
+def migrate(conn, migrations=MIGRATIONS, schema='main'):
+    version = conn.execute(f'PRAGMA {schema}.user_version').fetchone()[0]
+    for number, steps in enumerate(migrations[version:], start=version + 1):
+        # هر مهاجرت در یک تراکنش جداگانه اجرا می‌شود تا نیمه‌کاره باقی نماند
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f'PRAGMA {schema}.user_version = {number}')
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    return conn.execute(f'PRAGMA {schema}.user_version').fetchone()[0]
+
+
+class TodoRepository:
+    # حداکثر تعداد شناسه در هر دستور IN (...)؛ کمتر از سقف پارامترهای SQLite
+    ID_CHUNK = 500
+    # تعداد ردیف‌های هر تراکنش پر کردن ستون day؛ هر دسته فقط چند میلی‌ثانیه قفل نوشتن را نگه می‌دارد
+    BACKFILL_BATCH = 2000
+    # تعداد ردیف‌های هر تراکنش بایگانی و صفحه‌های آزادشده در هر مرحله incremental_vacuum
+    ARCHIVE_BATCH = 500
+    VACUUM_PAGES = 2000
+    # تعداد تلاش دوباره یک دسته بایگانی وقتی قفل نوشتن در busy_timeout آزاد نشود
+    ARCHIVE_RETRIES = 5
+    # تعداد ردیف‌های هر صفحه لیست روزانه
+    DAY_PAGE = 200
+    # تعداد ردیف‌های هر صفحه دستور کار
+    AGENDA_PAGE = 200
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.conn = self._connect()
+        self.create_schema()
+        # نخ‌های پس‌زمینه هر کدام اتصال خواندنی خودشان را دارند (در حالت WAL خواندن همزمان با نوشتن ممکن است).
+        # کلید شناسه نخ است نه threading.local، چون PyQt حالت پایتونی نخ‌های QThreadPool را پس از هر کار
+        # از بین می‌برد و داده‌های threading.local با آن پاک می‌شوند
+        self._owner_thread = threading.get_ident()
+        self._readers = {}
+        self._readers_lock = threading.Lock()
+        # تا وقتی ردیفی بدون شماره روز هست، کوئری‌های بازه‌ای روی ستون متنی date اجرا می‌شوند
+        self.days_ready = self.conn.execute('SELECT 1 FROM todos WHERE day IS NULL LIMIT 1').fetchone() is None
+        # آخرین شماره change_log دیده‌شده توسط changed_days (برای رابط کاربری)؛ None یعنی دنبال نمی‌شود
+        self.change_cursor = None
+        # قانون‌های تکرار و تکرارهای گسترش‌یافته هر بازه
+        self.occurrences = OccurrenceCache()
+        # بزرگ‌ترین شماره روز بایگانی‌شده (None یعنی بایگانی خالی است)؛ کوئری‌های بازه‌های بعد از آن
+        # اصلا به دیتابیس بایگانی نمی‌روند
+        self.archive_horizon = self.conn.execute('SELECT MAX(day) FROM archive.todos').fetchone()[0]
+
+    @classmethod
+    def prepare(cls, path=DB_PATH):
+        # اجرای مهاجرت‌ها با یک اتصال موقت (قابل اجرا در نخ پس‌زمینه)؛ باز کردن بعدی همان دیتابیس فقط
+        # شماره نسخه را بررسی می‌کند
+        cls(path).close()
+
+    def _connect(self, check_same_thread=True):
+        # یک اتصال ماندگار برای کل عمر برنامه؛ دستورات آماده در کش sqlite3 نگه داشته می‌شوند.
+        # فقط وقتی ردیابی فعال است اتصال از نوع TracedConnection ساخته می‌شود
+        conn = sqlite3.connect(self.path, cached_statements=256, check_same_thread=check_same_thread,
+                               factory=connection_factory())
+        conn.create_function('normalize_fa', 1, normalize, deterministic=True)
+        conn.create_function('jalali_ordinal', 1, day_ordinal, deterministic=True)
+        conn.create_function('moved_due', 2, moved_due)
+        conn.execute('ATTACH DATABASE ? AS archive', (archive_path(self.path),))
+        # auto_vacuum فقط پیش از ساخت اولین جدول (و پیش از WAL) اثر دارد؛ دیتابیس‌های قدیمی هنگام
+        # اولین بایگانی با یک VACUUM کامل تبدیل می‌شوند
+        conn.execute('PRAGMA main.auto_vacuum=INCREMENTAL')
+        conn.execute('PRAGMA archive.auto_vacuum=INCREMENTAL')
+        # حالت WAL و synchronous=NORMAL تا هر کلیک فقط یک نوشتن در ژورنال هزینه داشته باشد
+        conn.execute('PRAGMA main.journal_mode=WAL')
+        conn.execute('PRAGMA archive.journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    def create_schema(self):
+        # ایجاد یا به‌روزرسانی ساختار دیتابیس و بایگانی به آخرین نسخه
+        migrate(self.conn)
+        migrate(self.conn, ARCHIVE_MIGRATIONS, 'archive')
+        # متن جستجوی ردیف‌هایی که ابزارهای خارجی نوشته‌اند
+        if self.conn.execute('SELECT 1 FROM todos_fts_pending LIMIT 1').fetchone() is not None:
+            with self.conn:
+                _begin_immediate(self.conn)
+                _index_pending(self.conn)
+
+    def reader(self):
+        # اتصال مناسب برای خواندن در نخ فعلی
+        if threading.get_ident() == self._owner_thread:
+            return self.conn
+        thread = threading.get_ident()
+        conn = self._readers.get(thread)
+        if conn is None:
+            conn = self._connect(check_same_thread=False)
+            conn.execute('PRAGMA query_only=ON')
+            with self._readers_lock:
+                self._readers[thread] = conn
+        return conn
+
+    def close(self):
+        with self._readers_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+        if self.conn is not None:
+            # به‌روزرسانی آمار ایندکس‌ها برای برنامه‌ریز کوئری
+            self.conn.execute('PRAGMA optimize')
+            self.conn.close()
+            self.conn = None
+
+    def todos_for_date(self, date_str):
+        # همه کارهای یک روز به شکل LIST_COLUMNS
+        return self.day_page(date_str, limit=None)[0]
+
+    def day_page(self, date_str, after=0, limit=None):
+        # یک صفحه از کارهای یک روز به شکل LIST_COLUMNS، به ترتیب شناسه و با keyset روی id (limit=None یعنی
+        # همه ردیف‌ها). تکرارهای آن روز (با شناسه منفی) فقط در صفحه اول و پیش از ردیف‌ها می‌آیند.
+        # (ردیف‌ها، شناسه آخرین ردیف برای صفحه بعد یا None اگر ردیف دیگری نمانده است)
+        limit = limit if limit is not None else -1
+        rows = self.reader().execute(f'SELECT {LIST_COLUMNS} FROM todos WHERE date = ? AND id > ? ORDER BY id LIMIT ?',
+                                     (date_str, after, limit)).fetchall()
+        day = day_ordinal(date_str)
+        if day is not None and self._archived(day):
+            archived = self.reader().execute(f'SELECT {LIST_COLUMNS} FROM archive.todos WHERE day = ? AND id > ? '
+                                             f'ORDER BY id LIMIT ?', (day, after, limit)).fetchall()
+            if archived:
+                rows = list(heapq.merge(archived, rows))
+                if limit >= 0:
+                    del rows[limit:]
+        next_after = rows[-1][0] if rows and len(rows) == limit else None
+        if not after and day is not None:
+            occurrences = [_list_row(todo) for todo in self.occurrences_between(day, day)]
+            if occurrences:
+                rows = occurrences + rows
+        return rows, next_after
+
+    def get_description(self, todo_id):
+        todo = self.get_todo(todo_id)
+        return todo[3] if todo is not None else None
+
+    def iter_range(self, first_day=None, last_day=None, open_only=False, batch_size=500):
+        # کارهای یک بازه از شماره روزها (هر دو سر اختیاری) به شکل LIST_COLUMNS و به ترتیب روز،
+        # در دسته‌های batch_size تایی.
+        # تکرارها فقط در بازه‌های بسته گسترش داده می‌شوند (مثلا در فهرست کارهای عقب‌افتاده نمی‌آیند)
+        rows = self._range_rows(first_day, last_day, open_only, batch_size)
+        if first_day is not None and last_day is not None:
+            occurrences = [_list_row(todo) for todo in self.occurrences_between(first_day, last_day)
+                           if not (open_only and todo[5])]
+            if occurrences:
+                # کلیدهای YYYY-MM-DD به ترتیب متنی هم مرتب‌اند
+                rows = heapq.merge(occurrences, rows, key=lambda todo: todo[1])
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _range_conditions(self, first_day, last_day, open_only):
+        # (ستون روز، شرط‌ها، پارامترها) برای کارهای یک بازه؛ ترتیب (ستون، completed, id) همان ترتیب ایندکس است
+        conditions, params = [], []
+        if self.days_ready:
+            column = 'day'
+            # ردیف‌های UNKNOWN_DAY در هیچ بازه‌ای نمی‌آیند
+            bounds = (UNKNOWN_DAY + 1 if first_day is None else first_day, last_day)
+        else:
+            # کلیدهای YYYY-MM-DD به ترتیب متنی هم مرتب‌اند
+            column = 'date'
+            bounds = [None if day is None else key_from_ordinal(day) for day in (first_day, last_day)]
+        if bounds[0] is not None:
+            conditions.append(f'{column} >= ?')
+            params.append(bounds[0])
+        if bounds[1] is not None:
+            conditions.append(f'{column} <= ?')
+            params.append(bounds[1])
+        if open_only:
+            conditions.append('completed = 0')
+        return column, conditions, params
+
+    def _range_rows(self, first_day, last_day, open_only, batch_size):
+        # ترتیب (day, completed, id) همان ترتیب ایندکس است و مرتب‌سازی جداگانه لازم نیست
+        column, conditions, params = self._range_conditions(first_day, last_day, open_only)
+        where = ' AND '.join(conditions) or '1'
+        cursor = self.reader().execute(f'SELECT {LIST_COLUMNS} FROM todos WHERE {where} '
+                                       f'ORDER BY {column}, completed, id', params)
+        rows = _iter_rows(cursor, batch_size)
+        if open_only or not self._archived(first_day):
+            return rows
+        # کارهای بایگانی‌شده همه انجام‌شده‌اند و در فهرست‌های open_only نمی‌آیند
+        archived = self.reader().execute(f'SELECT {LIST_COLUMNS} FROM archive.todos '
+                                         f'WHERE day BETWEEN ? AND ? ORDER BY day, id',
+                                         (first_day or 0, last_day if last_day is not None else self.archive_horizon))
+        return heapq.merge(_iter_rows(archived, batch_size), rows, key=lambda todo: todo[1])
+
+    def overdue(self, today, batch_size=500):
+        # کارهای انجام‌نشده روزهای پیش از today (شماره روز)
+        return self.iter_range(last_day=today - 1, open_only=True, batch_size=batch_size)
+
+    def range_page(self, first_day=None, last_day=None, open_only=False, after=None, limit=None):
+        # یک صفحه از کارهای بازه (مثل iter_range) به ترتیب (تاریخ، completed، شناسه) با keyset:
+        # after کلید آخرین ردیف صفحه قبل است. (ردیف‌ها، after صفحه بعد یا None برای صفحه آخر)
+        limit = limit or self.AGENDA_PAGE
+        column, conditions, params = self._range_conditions(first_day, last_day, open_only)
+        if after is not None:
+            conditions.append(f'({column}, completed, id) > (?, ?, ?)')
+            params += [day_ordinal(after[0]) if column == 'day' else after[0], after[1], after[2]]
+        where = ' AND '.join(conditions) or '1'
+        # از هر منبع limit + 1 ردیف تا معلوم شود صفحه بعدی وجود دارد یا نه
+        sources = [self.reader().execute(f'SELECT {LIST_COLUMNS} FROM todos WHERE {where} '
+                                         f'ORDER BY {column}, completed, id LIMIT ?', (*params, limit + 1)).fetchall()]
+        if not open_only and self._archived(first_day):
+            # در بایگانی همه completed = 1 هستند و ترتیب (day, id) همان ترتیب کلید است
+            archive_after = (0, 0, 0) if after is None else (day_ordinal(after[0]), after[1], after[2])
+            sources.append(self.reader().execute(
+                f'SELECT {LIST_COLUMNS} FROM archive.todos WHERE day BETWEEN ? AND ? '
+                f'AND (day, completed, id) > (?, ?, ?) ORDER BY day, id LIMIT ?',
+                (first_day or 0, last_day if last_day is not None else self.archive_horizon, *archive_after,
+                 limit + 1)).fetchall())
+        key = _range_key
+        occurrences = sorted((_list_row(todo) for todo in self.occurrences_between(first_day, last_day)
+                              if not (open_only and todo[5])), key=key)
+        if after is not None:
+            occurrences = [todo for todo in occurrences if key(todo) > tuple(after)]
+        sources.append(occurrences)
+        rows = list(islice(heapq.merge(*sources, key=key), limit + 1))
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, key(rows[-1])
+
+    def backfill_days(self, batch_size=None, is_cancelled=None):
+        # پر کردن ستون day ردیف‌های قدیمی با اتصال نوشتنی جداگانه (قابل اجرا در نخ پس‌زمینه).
+        # هر دسته یک تراکنش کوتاه است تا نوشتن‌های رابط کاربری بین دسته‌ها انجام شوند
+        batch_size = batch_size or self.BACKFILL_BATCH
+        conn = self._connect(check_same_thread=False)
+        filled = 0
+        try:
+            # پنجره‌های پشت‌سرهم روی شناسه؛ NOT INDEXED تا به جای پیمایش همه ردیف‌های day IS NULL در
+            # ایندکس، فقط بازه کلید اصلی خوانده شود. ردیف‌های تازه از قبل day دارند
+            last_id = conn.execute('SELECT MAX(id) FROM todos').fetchone()[0] or 0
+            for start in range(0, last_id, batch_size):
+                if is_cancelled is not None and is_cancelled():
+                    return filled
+                with conn:
+                    cursor = conn.execute(f'UPDATE todos NOT INDEXED SET day = IFNULL(jalali_ordinal(date), {UNKNOWN_DAY}) '
+                                          'WHERE id > ? AND id <= ? AND day IS NULL', (start, start + batch_size))
+                filled += cursor.rowcount
+            self.days_ready = True
+        finally:
+            conn.close()
+        return filled
+
+    def day_counts(self, first_date, last_date):
+        # تعداد کارهای انجام‌نشده و انجام‌شده هر روز در یک بازه، با یک کوئری روی ایندکس (به همراه تکرارها)
+        rows = self.reader().execute('SELECT date, SUM(completed = 0), SUM(completed = 1) FROM todos '
+                                     'WHERE date BETWEEN ? AND ? GROUP BY date',
+                                     (first_date, last_date)).fetchall()
+        first_day, last_day = day_ordinal(first_date), day_ordinal(last_date)
+        occurrences = self.occurrences_between(first_day, last_day)
+        archived = []
+        if self._archived(first_day):
+            archived = self.reader().execute('SELECT date, SUM(completed = 0), SUM(completed = 1) FROM archive.todos '
+                                             'WHERE day BETWEEN ? AND ? GROUP BY day',
+                                             (first_day, last_day)).fetchall()
+        if not occurrences and not archived:
+            return rows
+        counts = {date_str: [pending, completed] for date_str, pending, completed in rows}
+        for date_str, pending, completed in archived:
+            day_count = counts.setdefault(date_str, [0, 0])
+            day_count[0] += pending
+            day_count[1] += completed
+        for todo in occurrences:
+            counts.setdefault(todo[1], [0, 0])[1 if todo[5] else 0] += 1
+        return [(date_str, pending, completed) for date_str, (pending, completed) in counts.items()]
+
+    # تکرارها
+
+    def _load_rules(self):
+        return self.reader().execute(f'SELECT {RULE_COLUMNS} FROM recurrences').fetchall()
+
+    def _occurrence(self, rule, day, exception):
+        # (روز نمایش، ردیف تسک) یک تکرار با اعمال استثنای آن؛ تکرار حذف‌شده None است
+        if exception is None:
+            return day, (occurrence_id(rule.id, day), day_date(day), rule.title, rule.description, rule.priority, 0)
+        _, _, completed, title, description, priority, moved_day, deleted = exception
+        if deleted:
+            return None
+        shown = day if moved_day is None else moved_day
+        return shown, (occurrence_id(rule.id, day), day_date(shown),
+                       rule.title if title is None else title,
+                       rule.description if description is None else description,
+                       rule.priority if priority is None else priority,
+                       completed or 0)
+
+    def occurrences_between(self, first_day, last_day):
+        # تکرارهایی که در بازه [first_day, last_day] نمایش داده می‌شوند، مرتب بر اساس (روز، شناسه).
+        # فقط همین بازه گسترش داده می‌شود و استثناها با دو کوئری روی کلید اصلی و ایندکس moved_day خوانده می‌شوند
+        if first_day is None or last_day is None:
+            return []
+        rules = self.occurrences.get_rules(self._load_rules)
+        if not rules:
+            return []
+        expanded = self.occurrences.expand(first_day, last_day, rules)
+        exceptions = {(row[0], row[1]): row for row in self.reader().execute(
+            f'SELECT {EXCEPTION_COLUMNS} FROM recurrence_exceptions WHERE day BETWEEN ? AND ? '
+            f'UNION ALL SELECT {EXCEPTION_COLUMNS} FROM recurrence_exceptions WHERE moved_day BETWEEN ? AND ?',
+            (first_day, last_day, first_day, last_day))}
+        shown = []
+        for day, rule_id in expanded:
+            occurrence = self._occurrence(rules[rule_id], day, exceptions.pop((day, rule_id), None))
+            if occurrence is not None and first_day <= occurrence[0] <= last_day:
+                shown.append(occurrence)
+        # تکرارهایی از بیرون بازه که به روزی در این بازه منتقل شده‌اند
+        for (day, rule_id), exception in exceptions.items():
+            rule = rules.get(rule_id)
+            if first_day <= day <= last_day or rule is None or not any(rule.days(day, day)):
+                continue
+            occurrence = self._occurrence(rule, day, exception)
+            if occurrence is not None:
+                shown.append(occurrence)
+        shown.sort(key=lambda occurrence: (occurrence[0], occurrence[1][0]))
+        return [todo for _, todo in shown]
+
+    def get_occurrence(self, todo_id):
+        rule_id, day = split_occurrence_id(todo_id)
+        rule = self.occurrences.get_rules(self._load_rules).get(rule_id)
+        if rule is None or not any(rule.days(day, day)):
+            return None
+        exception = self.reader().execute(f'SELECT {EXCEPTION_COLUMNS} FROM recurrence_exceptions '
+                                          'WHERE day = ? AND recurrence_id = ?', (day, rule_id)).fetchone()
+        occurrence = self._occurrence(rule, day, exception)
+        return None if occurrence is None else occurrence[1]
+
+    def add_recurrence(self, date_str, title, description, priority, frequency, interval=1):
+        with self._write():
+            cur = self.conn.execute('INSERT INTO recurrences (title, description, priority, frequency, interval, '
+                                    'start_day) VALUES (?, ?, ?, ?, ?, ?)',
+                                    (title, description, priority, frequency, interval, day_ordinal(date_str)))
+        self.occurrences.invalidate()
+        return cur.lastrowid
+
+    def end_recurrence(self, rule_id, last_day):
+        # قانون پس از last_day دیگر تکرار نمی‌شود؛ اگر هیچ تکراری باقی نماند کلا حذف می‌شود
+        with self._write():
+            self.conn.execute('DELETE FROM recurrences WHERE id = ? AND start_day > ?', (rule_id, last_day))
+            self.conn.execute('UPDATE recurrences SET end_day = ? WHERE id = ?', (last_day, rule_id))
+            self.conn.execute('DELETE FROM recurrence_exceptions WHERE recurrence_id = ? AND day > ?',
+                              (rule_id, last_day))
+        self.occurrences.invalidate()
+
+    def delete_recurrence(self, rule_id):
+        with self._write():
+            self.conn.execute('DELETE FROM recurrences WHERE id = ?', (rule_id,))
+            self.conn.execute('DELETE FROM recurrence_exceptions WHERE recurrence_id = ?', (rule_id,))
+        self.occurrences.invalidate()
+
+    def iter_recurrences(self):
+        # قانون‌ها به ترتیب شناسه، هر کدام با فهرست استثناهایش (برای برون‌بری)؛ استثناها با یک کوئری
+        # مرتب خوانده و کنار قانون خودشان گذاشته می‌شوند
+        rules = self.reader().execute(f'SELECT {RULE_COLUMNS} FROM recurrences ORDER BY id').fetchall()
+        groups = groupby(self.reader().execute(f'SELECT {EXCEPTION_COLUMNS} FROM recurrence_exceptions '
+                                               'ORDER BY recurrence_id, day'), key=lambda row: row[1])
+        group = next(groups, None)
+        for rule in rules:
+            while group is not None and group[0] < rule[0]:
+                group = next(groups, None)
+            if group is not None and group[0] == rule[0]:
+                yield rule, list(group[1])
+                group = next(groups, None)
+            else:
+                yield rule, []
+
+    def insert_recurrences(self, rules, exceptions, rule_ids):
+        # درج گروهی قانون‌ها و سپس استثناها در یک تراکنش (برای درون‌ریزی).
+        # rules: (کلید، title, description, priority, frequency, interval, start_day, end_day)
+        # exceptions: (کلید قانون، day, completed, title, description, priority, moved_day, deleted)
+        # rule_ids نگاشت کلید قانون در فایل به شناسه جدید است و بین دسته‌ها نگه داشته می‌شود؛ تعداد
+        # استثناهایی که قانونشان پیدا نشد (و درج نشدند) برگردانده می‌شود
+        with self._write():
+            for key, *rule in rules:
+                rule_ids[key] = self.conn.execute('INSERT INTO recurrences (title, description, priority, frequency, '
+                                                  'interval, start_day, end_day) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                                  rule).lastrowid
+            known = [(rule_ids[key], *exception) for key, *exception in exceptions if key in rule_ids]
+            self.conn.executemany('INSERT OR REPLACE INTO recurrence_exceptions (recurrence_id, day, completed, '
+                                  'title, description, priority, moved_day, deleted) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                  known)
+        self.occurrences.invalidate()
+        return len(exceptions) - len(known)
+
+    def _update_occurrences(self, occurrences, **values):
+        with self._write():
+            self._write_occurrences(occurrences, **values)
+
+    def _write_occurrences(self, occurrences, **values):
+        # ثبت استثنا برای تکرارهای (شناسه قانون، روز)؛ ستون‌های دیگر استثنای قبلی دست نمی‌خورند.
+        # بدون commit، داخل تراکنش فراخواننده
+        columns = ', '.join(values)
+        updates = ', '.join(f'{column} = excluded.{column}' for column in values)
+        self.conn.executemany(f'INSERT INTO recurrence_exceptions (day, recurrence_id, {columns}) '
+                              f'VALUES (?, ?{", ?" * len(values)}) '
+                              f'ON CONFLICT (day, recurrence_id) DO UPDATE SET {updates}',
+                              [(day, rule_id, *values.values()) for rule_id, day in occurrences])
+
+    def search(self, text, limit=100):
+        # جدیدترین تسک‌هایی که همه کلمات جستجو (به صورت پیشوندی) در عنوان یا توضیحاتشان هست
+        query = search_terms(text)
+        if not query:
+            return []
+        rows = self.reader().execute('''SELECT t.id, t.date, t.title FROM todos t
+                                        JOIN (SELECT rowid FROM todos_fts WHERE todos_fts MATCH ?
+                                              ORDER BY rowid DESC LIMIT ?) AS matches
+                                        ON t.id = matches.rowid
+                                        ORDER BY t.id DESC''', (query, limit)).fetchall()
+        if self.archive_horizon is None or len(rows) >= limit:
+            return rows
+        # نتایج بایگانی قدیمی‌ترند و فقط جای خالی تا limit را پر می‌کنند
+        rows += self.reader().execute('''SELECT a.id, a.date, a.title FROM archive.todos a
+                                         JOIN (SELECT rowid FROM archive.todos_fts WHERE todos_fts MATCH ?
+                                               ORDER BY rowid DESC LIMIT ?) AS matches
+                                         ON a.id = matches.rowid
+                                         ORDER BY a.id DESC''', (query, limit - len(rows))).fetchall()
+        return rows
+
+    # بایگانی
+
+    def _archived(self, first_day):
+        # آیا بازه‌ای که از first_day (یا از ابتدا) شروع می‌شود ممکن است ردیف بایگانی‌شده داشته باشد
+        horizon = self.archive_horizon
+        return horizon is not None and (first_day is None or first_day <= horizon)
+
+    def _restore(self, todo_ids):
+        # کار بایگانی‌شده‌ای که تغییر می‌کند به جدول اصلی برمی‌گردد تا نوشتن‌ها فقط روی todos انجام شوند.
+        # بدون commit، داخل تراکنش فراخواننده؛ اگر تراکنش هنوز شروع نشده باشد آن را IMMEDIATE شروع می‌کند
+        if self.archive_horizon is None:
+            return
+        _begin_immediate(self.conn)
+        for start in range(0, len(todo_ids), self.ID_CHUNK):
+            chunk = todo_ids[start:start + self.ID_CHUNK]
+            ids = ','.join('?' * len(chunk))
+            self.conn.execute(f'INSERT INTO todos ({TODO_COLUMNS}, day, due) SELECT {TODO_COLUMNS}, day, due '
+                              f'FROM archive.todos WHERE id IN ({ids})', chunk)
+            self.conn.execute(f'DELETE FROM archive.todos_fts WHERE rowid IN ({ids})', chunk)
+            self.conn.execute(f'DELETE FROM archive.todos WHERE id IN ({ids})', chunk)
+
+    def archive_completed(self, older_than_days=ARCHIVE_AGE_DAYS, today=None, batch_size=None, is_cancelled=None,
+                          progress=None):
+        # انتقال کارهای انجام‌شده قدیمی‌تر از older_than_days روز به دیتابیس بایگانی و سپس آزاد کردن فضای
+        # خالی‌شده. اتصال نوشتنی جداگانه دارد (قابل اجرا در نخ پس‌زمینه) و هر دسته یک تراکنش کوتاه است.
+        # تراکنش‌های WAL روی دو فایل فقط جداگانه اتمی‌اند؛ اگر برنامه بین دو commit بسته شود ردیف در هر دو
+        # دیتابیس می‌ماند و اجرای بعدی آن را دوباره (با INSERT OR REPLACE) منتقل می‌کند
+        started = time.perf_counter()
+        batch_size = min(batch_size or self.ARCHIVE_BATCH, self.ID_CHUNK)
+        if not self.days_ready:
+            self.backfill_days(is_cancelled=is_cancelled)
+        before_day = (today if today is not None else date.today().toordinal()) - older_than_days
+        conn = self._connect(check_same_thread=False)
+        archived = 0
+        try:
+            bytes_before = self._database_bytes(conn, 'main')
+            # شروع هر دسته از روز آخرین دسته قبلی، تا کارهای انجام‌نشده روزهای قدیمی دوباره پیمایش نشوند
+            first_day = UNKNOWN_DAY + 1
+            retries = 0
+            while is_cancelled is None or not is_cancelled():
+                try:
+                    _begin_immediate(conn)
+                except sqlite3.OperationalError:
+                    # قفل نوشتن پس از busy_timeout هم آزاد نشد (مثلا نوشتن طولانی برنامه دیگر)؛ دسته دوباره امتحان می‌شود
+                    retries += 1
+                    if retries > self.ARCHIVE_RETRIES:
+                        raise
+                    continue
+                retries = 0
+                with conn:
+                    # متن جستجوی بایگانی از todos_fts کپی می‌شود
+                    _index_pending(conn)
+                    rows = conn.execute('SELECT id, day FROM todos WHERE day >= ? AND day < ? AND completed = 1 '
+                                        'ORDER BY day LIMIT ?', (first_day, before_day, batch_size)).fetchall()
+                    if not rows:
+                        break
+                    chunk = [todo_id for todo_id, _ in rows]
+                    ids = ','.join('?' * len(chunk))
+                    conn.execute(f'INSERT OR REPLACE INTO archive.todos ({TODO_COLUMNS}, day, due) '
+                                 f'SELECT {TODO_COLUMNS}, day, due FROM todos WHERE id IN ({ids})', chunk)
+                    conn.execute(f'DELETE FROM archive.todos_fts WHERE rowid IN ({ids})', chunk)
+                    conn.execute(f'INSERT INTO archive.todos_fts (rowid, title, description) '
+                                 f'SELECT rowid, title, description FROM main.todos_fts WHERE rowid IN ({ids})', chunk)
+                    conn.execute(f'DELETE FROM todos WHERE id IN ({ids})', chunk)
+                archived += len(chunk)
+                first_day = rows[-1][1]
+                if progress is not None:
+                    progress(archived)
+            self.archive_horizon = conn.execute('SELECT MAX(day) FROM archive.todos').fetchone()[0]
+            self._reclaim(conn)
+            bytes_after = self._database_bytes(conn, 'main')
+            archive_bytes = self._database_bytes(conn, 'archive')
+        finally:
+            conn.close()
+        return {'rows': archived, 'bytes_before': bytes_before, 'bytes_after': bytes_after,
+                'bytes_reclaimed': bytes_before - bytes_after, 'archive_bytes': archive_bytes,
+                'seconds': time.perf_counter() - started}
+
+    def _reclaim(self, conn):
+        # آزاد کردن صفحه‌های خالی. incremental_vacuum در دسته‌های VACUUM_PAGES تایی اجرا می‌شود تا قفل
+        # نوشتن هر بار کوتاه باشد؛ executescript آن را تا آخر اجرا می‌کند (execute فقط یک صفحه آزاد می‌کند)
+        if conn.execute('PRAGMA main.auto_vacuum').fetchone()[0] != 2:
+            # دیتابیس‌های ساخته‌شده پیش از بایگانی: یک بار VACUUM کامل تا auto_vacuum فعال شود
+            conn.execute('PRAGMA main.auto_vacuum=INCREMENTAL')
+            conn.execute('VACUUM main')
+        for schema in ('main', 'archive'):
+            free = conn.execute(f'PRAGMA {schema}.freelist_count').fetchone()[0]
+            while free:
+                conn.executescript(f'PRAGMA {schema}.incremental_vacuum({self.VACUUM_PAGES})')
+                remaining = conn.execute(f'PRAGMA {schema}.freelist_count').fetchone()[0]
+                if remaining >= free:
+                    break
+                free = remaining
+        # فایل اصلی در حالت WAL پس از checkpoint کوچک می‌شود
+        conn.execute('PRAGMA main.wal_checkpoint(TRUNCATE)')
+
+    @staticmethod
+    def _database_bytes(conn, schema):
+        page_count = conn.execute(f'PRAGMA {schema}.page_count').fetchone()[0]
+        return page_count * conn.execute(f'PRAGMA {schema}.page_size').fetchone()[0]
+
+    # تغییرات برنامه‌های دیگر
+
+    def data_version(self):
+        # فقط با commit اتصال‌های دیگر (برنامه دیگر یا نخ‌های پس‌زمینه همین برنامه) تغییر می‌کند؛ بسیار ارزان است
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def last_change(self):
+        return self.conn.execute('SELECT IFNULL(MAX(seq), 0) FROM change_log').fetchone()[0]
+
+    def changed_days(self, since):
+        # (آخرین شماره تغییر، شماره روزهایی که پس از since تغییر کرده‌اند؛ ALL_DAYS یعنی همه روزها).
+        # قابل اجرا در نخ پس‌زمینه
+        conn = self.reader()
+        rows = conn.execute('SELECT day, seq FROM change_log WHERE seq > ?', (since,)).fetchall()
+        # برنامه دیگر ممکن است کارهایی را بایگانی کرده باشد
+        self.archive_horizon = conn.execute('SELECT MAX(day) FROM archive.todos').fetchone()[0]
+        return max((seq for _, seq in rows), default=since), {day for day, _ in rows}
+
+    @contextmanager
+    def _write(self):
+        # تراکنش نوشتنی اتصال اصلی (به جای with self.conn). اگر تا شروع آن همه تغییرات change_log دیده شده
+        # باشد، change_cursor پس از commit از تغییرات خود این تراکنش هم رد می‌شود تا changed_days آن‌ها را
+        # تغییر برنامه‌های دیگر حساب نکند؛ قفل نوشتن از ابتدا گرفته می‌شود تا اتصال دیگری بین این دو خواندن
+        # تغییری ثبت نکند. متن جستجوی ردیف‌های نوشته‌شده پیش از commit در todos_fts نوشته می‌شود
+        with self.conn:
+            _begin_immediate(self.conn)
+            seen = self.change_cursor is not None and self.last_change() == self.change_cursor
+            yield
+            _index_pending(self.conn)
+            cursor = self.last_change() if seen else None
+        if cursor is not None:
+            self.change_cursor = cursor
+
+    def get_todo(self, todo_id):
+        if todo_id < 0:
+            return self.get_occurrence(todo_id)
+        return self._find(TODO_COLUMNS, todo_id)
+
+    def _find(self, columns, todo_id):
+        # ستون‌های یک کار از جدول اصلی، یا اگر آنجا نباشد از بایگانی
+        todo = self.reader().execute(f'SELECT {columns} FROM todos WHERE id = ?', (todo_id,)).fetchone()
+        if todo is None and self.archive_horizon is not None:
+            todo = self.reader().execute(f'SELECT {columns} FROM archive.todos WHERE id = ?', (todo_id,)).fetchone()
+        return todo
+
+    def add_todo(self, date_str, title, description, priority, due=None):
+        with self._write():
+            cur = self.conn.execute('INSERT INTO todos (date, day, title, description, priority, due) '
+                                    'VALUES (?, ?, ?, ?, ?, ?)',
+                                    (date_str, stored_day(date_str), title, description, priority, due))
+        return cur.lastrowid
+
+    # یادآوری‌ها
+
+    def get_due(self, todo_id):
+        # تکرارها زمان یادآوری ندارند
+        if todo_id < 0:
+            return None
+        row = self._find('due', todo_id)
+        return row[0] if row is not None else None
+
+    def upcoming_reminders(self, after_due, after_id, limit):
+        # [(due, id, title)] یادآوری‌های کارهای انجام‌نشده بعد از (after_due, after_id)، به ترتیب زمان؛
+        # فقط limit ردیف از ایندکس جزئی idx_todos_due خوانده می‌شود
+        return self.conn.execute('SELECT due, id, title FROM todos '
+                                 'WHERE due IS NOT NULL AND completed = 0 AND (due, id) > (?, ?) '
+                                 'ORDER BY due, id LIMIT ?', (after_due, after_id, limit)).fetchall()
+
+    def reminder(self, todo_id):
+        # (due, title) اگر کار هنوز انجام‌نشده و دارای یادآوری باشد
+        return self.conn.execute('SELECT due, title FROM todos WHERE id = ? AND due IS NOT NULL AND completed = 0',
+                                 (todo_id,)).fetchone()
+
+    def insert_many(self, rows):
+        # درج گروهی در یک تراکنش؛ هر ردیف: (date, title, description, priority, completed, due)
+        with self._write():
+            self.conn.executemany('INSERT INTO todos (date, title, description, priority, completed, due, day) '
+                                  'VALUES (?, ?, ?, ?, ?, ?, ?)', ((*row, stored_day(row[0])) for row in rows))
+
+    def iter_todos(self, batch_size=1000):
+        # خواندن تدریجی کل جدول (و سپس بایگانی) بدون بارگذاری همه ردیف‌ها در حافظه
+        cursor = self.reader().execute(f'SELECT {TRANSFER_COLUMNS} FROM todos ORDER BY id')
+        yield from _iter_rows(cursor, batch_size)
+        cursor = self.reader().execute(f'SELECT {TRANSFER_COLUMNS} FROM archive.todos ORDER BY id')
+        yield from _iter_rows(cursor, batch_size)
+
+    def set_completed(self, todo_id, completed):
+        if todo_id < 0:
+            self._update_occurrences([split_occurrence_id(todo_id)], completed=completed)
+            return
+        with self._write():
+            self._restore([todo_id])
+            self.conn.execute('UPDATE todos SET completed = ? WHERE id = ?', (completed, todo_id))
+
+    def update_todo(self, todo_id, title, description, priority):
+        if todo_id < 0:
+            self._update_occurrences([split_occurrence_id(todo_id)], title=title, description=description,
+                                     priority=priority)
+            return
+        with self._write():
+            self._restore([todo_id])
+            self.conn.execute('UPDATE todos SET title = ?, description = ?, priority = ? WHERE id = ?',
+                              (title, description, priority, todo_id))
+
+    def apply_changes(self, changes):
+        # شناسه -> {ستون: مقدار}؛ تغییرات جمع‌شده صف نوشتن رابط کاربری با یک commit نوشته می‌شوند
+        with self._write():
+            self._restore([todo_id for todo_id in changes if todo_id > 0])
+            for todo_id, values in changes.items():
+                unknown = set(values).difference(EDITABLE_COLUMNS)
+                if unknown:
+                    raise ValueError(f"ستون نامعتبر: {', '.join(sorted(unknown))}")
+                if todo_id < 0:
+                    self._write_occurrences([split_occurrence_id(todo_id)], **values)
+                else:
+                    assignments = ', '.join(f'{column} = ?' for column in values)
+                    self.conn.execute(f'UPDATE todos SET {assignments} WHERE id = ?', (*values.values(), todo_id))
+
+    def _execute_for_ids(self, sql, params, todo_ids, **occurrence_values):
+        # کل عملیات در یک تراکنش؛ شناسه‌ها در دسته‌های ID_CHUNK تایی در {ids} قرار می‌گیرند.
+        # برای شناسه‌های منفی (تکرارها) به جای آن استثنایی با occurrence_values ثبت می‌شود
+        todo_ids, occurrences = split_ids(todo_ids)
+        with self._write():
+            if occurrences:
+                self._write_occurrences(occurrences, **occurrence_values)
+            self._restore(todo_ids)
+            for start in range(0, len(todo_ids), self.ID_CHUNK):
+                chunk = todo_ids[start:start + self.ID_CHUNK]
+                self.conn.execute(sql.format(ids=','.join('?' * len(chunk))), (*params, *chunk))
+
+    def set_completed_many(self, todo_ids, completed):
+        self._execute_for_ids('UPDATE todos SET completed = ? WHERE id IN ({ids})', (completed,), todo_ids,
+                              completed=completed)
+
+    def set_priority_many(self, todo_ids, priority):
+        self._execute_for_ids('UPDATE todos SET priority = ? WHERE id IN ({ids})', (priority,), todo_ids,
+                              priority=priority)
+
+    def move_many(self, todo_ids, date_str):
+        day = day_ordinal(date_str)
+        # زمان یادآوری همراه کار به روز جدید می‌رود (همان ساعت)
+        self._execute_for_ids('UPDATE todos SET date = ?, day = ?, due = moved_due(due, ?) WHERE id IN ({ids})',
+                              (date_str, stored_day(date_str), date_str), todo_ids, moved_day=day)
+
+    def delete_many(self, todo_ids):
+        self._execute_for_ids('DELETE FROM todos WHERE id IN ({ids})', (), todo_ids, deleted=1)
+
+    def delete_by_date(self, date_str):
+        day = day_ordinal(date_str)
+        occurrences = [split_occurrence_id(todo[0]) for todo in self.occurrences_between(day, day)]
+        with self._write():
+            if occurrences:
+                self._write_occurrences(occurrences, deleted=1)
+            self.conn.execute('DELETE FROM todos WHERE date = ?', (date_str,))
+            if day is not None and self._archived(day):
+                self.conn.execute('DELETE FROM archive.todos_fts WHERE rowid IN '
+                                  '(SELECT id FROM archive.todos WHERE day = ?)', (day,))
+                if self.conn.execute('DELETE FROM archive.todos WHERE day = ?', (day,)).rowcount:
+                    # تریگرهای change_log فقط روی جدول‌های دیتابیس اصلی هستند
+                    self.conn.execute(_log_change('?'), (day,))
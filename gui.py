@@ -0,0 +1,1715 @@
+import jdatetime
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
+                            QHBoxLayout, QCalendarWidget, QListView, QListWidget, QListWidgetItem, QPushButton, 
+                            QLineEdit, QTextEdit, QComboBox, QLabel, QMessageBox, QDialog,
+                            QStyledItemDelegate, QStyleOptionButton, QMenu, QAbstractItemView,
+                            QFileDialog, QProgressDialog, QInputDialog, QCheckBox, QTimeEdit, QSystemTrayIcon)
+from PyQt6.QtCore import (Qt, QDate, QTime, QLocale, QAbstractListModel, QModelIndex, QRect, QSize, QEvent, QTimer,
+                          pyqtSignal)
+from PyQt6.QtGui import QFont, QColor, QPalette, QFontMetrics, QKeySequence, QShortcut
+import logging
+import os
+import threading
+import time
+from functools import partial
+from PyQt6.QtWidgets import QStyle
+from database import ALL_DAYS, ARCHIVE_AGE_DAYS, DB_PATH, TodoRepository, day_ordinal
+from workers import ProgressSignals, QueryExecutor, WriteQueue
+import transfer
+from cache import LRUCache
+from jalali import (MONTH_NAMES, JalaliDateCache, date_key, grid_range, key_from_ordinal, month_range,
+                    ordinal_from_key, time_from_timestamp, timestamp_from_key, today_key, week_range)
+from persian_text import search_terms
+from profiling import StartupProfile
+from recurrence import FREQUENCIES, split_occurrence_id
+from reminders import ReminderScheduler
+from tracing import TRACER
+
+log = logging.getLogger(__name__)
+
+# اختلاف شماره روز ژولینی Qt با شماره روز میلادی پایتون (date.toordinal)
+JULIAN_DAY_OFFSET = 1721425
+
+class JalaliCalendarWidget(QCalendarWidget):
+    DENSITY_LEVELS = 8
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # کش تبدیل تاریخ خانه‌های صفحه فعلی و فونت‌ها تا رسم مجدد فقط جستجو باشد
+        self.date_cache = JalaliDateCache()
+        self.day_font = QFont("Vazir", 9)
+        self.month_font = QFont("Vazir", 7)
+        self.friday_color = QColor(255, 0, 0)
+        self.light_text_color = QColor(200, 200, 200)  # رنگ روشن برای تم تیره
+        self.dark_text_color = QColor(0, 0, 0)  # رنگ تیره برای تم روشن
+        # تعداد کارهای هر روز صفحه فعلی: شماره روز میلادی -> (انجام‌نشده، انجام‌شده)
+        self.day_counts = {}
+        # رنگ‌های از پیش ساخته‌شده نقشه حرارتی؛ هر سطح یک کار بیشتر
+        self.density_colors = [QColor(106, 27, 154, 25 + level * 20) for level in range(self.DENSITY_LEVELS)]
+        # در حالت ردیابی، خانه‌هایی که در یک رویداد رسم پشت‌سرهم کشیده می‌شوند یک span هستند
+        self.paint_batch = TRACER.batch("paintCell batch", "paint")
+        self.setup_jalali_calendar()
+        self.selectionChanged.connect(self.update_header)
+        self.currentPageChanged.connect(self.date_cache.fill_grid)
+        self.date_cache.fill_grid(self.yearShown(), self.monthShown())
+        self.is_dark_mode = False
+        
+    def setup_jalali_calendar(self):
+        # تنظیم تقویم به فارسی
+        self.setLocale(QLocale(QLocale.Language.Persian, QLocale.Country.Iran))
+        
+        # مخفی کردن نوار بالایی تقویم
+        self.setNavigationBarVisible(False)
+        
+        # تنظیم نام‌های ماه‌های شمسی
+        self.setHorizontalHeaderFormat(QCalendarWidget.HorizontalHeaderFormat.SingleLetterDayNames)
+        self.setVerticalHeaderFormat(QCalendarWidget.VerticalHeaderFormat.NoVerticalHeader)
+        
+        # تنظیم نام‌های ماه‌ها
+        self.setFirstDayOfWeek(Qt.DayOfWeek.Saturday)
+        
+        # ایجاد لیبل برای نمایش تاریخ شمسی
+        self.header_label = QLabel()
+        self.header_label.setFont(QFont("Vazir", 12))
+        self.header_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.header_label.setStyleSheet("""
+            QLabel {
+                background-color: #6A1B9A;
+                color: white;
+                padding: 5px;
+                border-radius: 5px;
+            }
+        """)
+        self.update_header()
+        
+    def update_header(self):
+        date = self.selectedDate()
+        month_name = MONTH_NAMES[date.month - 1]
+        self.header_label.setText(f"{month_name} {date.year}")
+        
+    def set_day_counts(self, day_counts):
+        self.day_counts = day_counts
+        self.updateCells()
+        
+    def selectedDate(self):
+        date = super().selectedDate()
+        return self.date_cache.get(date.toJulianDay() - JULIAN_DAY_OFFSET)
+        
+    def paintCell(self, painter, rect, date):
+        if not TRACER.enabled:
+            self.draw_cell(painter, rect, date)
+            return
+        started = time.perf_counter()
+        self.draw_cell(painter, rect, date)
+        if self.paint_batch.add(started, time.perf_counter()):
+            QTimer.singleShot(0, self.paint_batch.flush)
+        
+    def draw_cell(self, painter, rect, date):
+        # تبدیل تاریخ میلادی به شمسی (از کش صفحه فعلی)
+        ordinal = date.toJulianDay() - JULIAN_DAY_OFFSET
+        jdate = self.date_cache.get(ordinal)
+        counts = self.day_counts.get(ordinal)
+        
+        # رنگ پس‌زمینه بر اساس تعداد کارهای روز
+        if counts:
+            total = counts[0] + counts[1]
+            painter.fillRect(rect.adjusted(1, 1, -1, -1),
+                             self.density_colors[min(total, self.DENSITY_LEVELS) - 1])
+        
+        # تنظیم رنگ و فونت
+        painter.setFont(self.day_font)
+        
+        # تعیین رنگ متن بر اساس تم برنامه
+        if self.is_dark_mode:
+            text_color = self.light_text_color
+        else:
+            text_color = self.dark_text_color
+        
+        # اگر روز جمعه است، رنگ قرمز استفاده کن
+        if date.dayOfWeek() == 5:  # 5 معادل جمعه در Qt است
+            painter.setPen(self.friday_color)
+        else:
+            painter.setPen(text_color)
+        
+        # رسم عدد روز
+        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, str(jdate.day))
+        
+        # اگر روز اول ماه است، نام ماه را نمایش بده
+        if jdate.day == 1:
+            month_name = MONTH_NAMES[jdate.month - 1]
+            painter.setFont(self.month_font)
+            painter.drawText(rect.adjusted(2, 2, -2, -2), 
+                           Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft, 
+                           month_name)
+        
+        # تعداد کارهای انجام‌شده از کل کارهای روز
+        if counts:
+            painter.setFont(self.month_font)
+            painter.drawText(rect.adjusted(2, 2, -2, -2),
+                           Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter,
+                           f"{counts[1]}/{counts[0] + counts[1]}")
+
+class TodoListModel(QAbstractListModel):
+    # نقش‌های سفارشی برای دسترسی به فیلدهای تسک
+    IdRole = Qt.ItemDataRole.UserRole + 1
+    PriorityRole = Qt.ItemDataRole.UserRole + 2
+
+    # (شناسه تسک، مقدار Qt.CheckState)
+    completion_changed = pyqtSignal(int, int)
+    # (تاریخ، شناسه آخرین ردیف خوانده‌شده) — درخواست صفحه بعدی روزی که کامل بارگذاری نشده است
+    page_requested = pyqtSignal(str, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # هر تسک یک ردیف database.LIST_COLUMNS است: (id, date, title, None, priority, completed)؛
+        # توضیحات فقط هنگام نمایش یا ویرایش خوانده می‌شود
+        self.todos = []
+        # تاریخ روزی که لیست نشان می‌دهد و نگاشت شناسه تسک به شماره ردیف
+        self.date_str = None
+        self.rows_by_id = {}
+        # روزهای بزرگ صفحه به صفحه و با اسکرول خوانده می‌شوند؛ None یعنی همه ردیف‌های روز در لیست است
+        self.next_after = None
+        self.fetching = False
+
+    def set_todos(self, todos, date_str=None, next_after=None):
+        todos = list(todos)
+        with TRACER.span("set_todos", "model", rows=len(todos), date=date_str):
+            self.beginResetModel()
+            self.todos = todos
+            self.date_str = date_str
+            self.rows_by_id = {}
+            self.next_after = next_after
+            self.fetching = False
+            self._reindex(0)
+            self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.next_after is not None and not self.fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.fetching = True
+            self.page_requested.emit(self.date_str, self.next_after)
+
+    def append_page(self, todos, next_after):
+        self.fetching = False
+        self.next_after = next_after
+        # ردیف‌هایی که پس از خواندن صفحه اول اضافه شده‌اند از قبل در لیست هستند
+        todos = [todo for todo in todos if todo[0] not in self.rows_by_id]
+        if not todos:
+            return
+        start = len(self.todos)
+        self.beginInsertRows(QModelIndex(), start, start + len(todos) - 1)
+        self.todos.extend(todos)
+        self._reindex(start)
+        self.endInsertRows()
+
+    def _reindex(self, start):
+        for row in range(start, len(self.todos)):
+            self.rows_by_id[self.todos[row][0]] = row
+
+    def todo_by_id(self, todo_id):
+        row = self.rows_by_id.get(todo_id)
+        return None if row is None else self.todos[row]
+
+    def insert_todo(self, todo):
+        row = len(self.todos)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.todos.append(todo)
+        self.rows_by_id[todo[0]] = row
+        self.endInsertRows()
+
+    def update_todo(self, todo):
+        row = self.rows_by_id.get(todo[0])
+        if row is None:
+            return
+        self.todos[row] = todo
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove_todos(self, todo_ids):
+        rows = sorted((self.rows_by_id.pop(todo_id) for todo_id in todo_ids if todo_id in self.rows_by_id),
+                      reverse=True)
+        if not rows:
+            return
+        # حذف ردیف‌های پشت سر هم در یک مرحله، از انتهای لیست به ابتدا
+        end = start = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == start - 1:
+                start = row
+                continue
+            self.beginRemoveRows(QModelIndex(), start, end)
+            del self.todos[start:end + 1]
+            self.endRemoveRows()
+            if row is not None:
+                end = start = row
+        self._reindex(rows[-1])
+
+    def todo_at(self, index):
+        if not index.isValid() or index.row() >= len(self.todos):
+            return None
+        return self.todos[index.row()]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.todos)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        todo = self.todo_at(index)
+        if todo is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return todo[2]
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if todo[5] == 1 else Qt.CheckState.Unchecked
+        if role == self.IdRole:
+            return todo[0]
+        if role == self.PriorityRole:
+            return todo[4]
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        todo = self.todo_at(index)
+        if todo is None or role != Qt.ItemDataRole.CheckStateRole:
+            return False
+        state = value.value if isinstance(value, Qt.CheckState) else int(value)
+        completed = 1 if state == Qt.CheckState.Checked.value else 0
+        if completed == todo[5]:
+            return False
+        self.todos[index.row()] = todo[:5] + (completed,)
+        self.dataChanged.emit(index, index, [role])
+        self.completion_changed.emit(todo[0], state)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsUserCheckable
+
+
+class AgendaModel(QAbstractListModel):
+    # ردیف‌های دستور کار (database.LIST_COLUMNS)؛ مثل روزهای بزرگ صفحه به صفحه و با اسکرول خوانده می‌شوند
+    # تا فهرست‌های طولانی (مثلا کارهای عقب‌افتاده) فقط به اندازه بخش دیده‌شده زمان و حافظه بگیرند
+
+    # کلید آخرین ردیف خوانده‌شده (تاریخ، completed، شناسه) — درخواست صفحه بعدی
+    page_requested = pyqtSignal(object)
+
+    EMPTY_TEXT = "کاری در این بازه نیست"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        # None یعنی همه ردیف‌ها خوانده شده‌اند؛ loaded تا رسیدن صفحه اول False است
+        self.next_after = None
+        self.fetching = False
+        self.loaded = False
+
+    def set_rows(self, rows, next_after=None, loaded=True):
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.next_after = next_after
+        self.fetching = False
+        self.loaded = loaded
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.next_after is not None and not self.fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.fetching = True
+            self.page_requested.emit(self.next_after)
+
+    def append_page(self, rows, next_after):
+        self.fetching = False
+        self.next_after = next_after
+        if not rows:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        # یک ردیف پیام برای بازه خالی
+        return len(self.rows) or int(self.loaded)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if not self.rows:
+            return self.EMPTY_TEXT if role == Qt.ItemDataRole.DisplayRole else None
+        todo_id, date_str, title, _, _, completed = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            marker = "↻ " if todo_id < 0 else ""
+            return f"{date_str}  {'✓' if completed else '○'}  {marker}{title}"
+        if role == Qt.ItemDataRole.UserRole:
+            return todo_id, date_str
+        return None
+
+    def flags(self, index):
+        if not index.isValid() or not self.rows:
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+
+class TodoItemDelegate(QStyledItemDelegate):
+    # کلیک روی عنوان تسک (برای نمایش توضیحات)
+    title_clicked = pyqtSignal(QModelIndex)
+
+    STARS = {2: "★★★", 1: "★★☆", 0: "★☆☆"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # فونت ستاره‌ها فقط یک بار ساخته می‌شود
+        self.star_font = QFont("Arial", 12)
+        self.star_metrics = QFontMetrics(self.star_font)
+        self.stars_width = self.star_metrics.horizontalAdvance("★★★") + 4
+
+    def stars_text(self, priority):
+        return self.STARS.get(priority, "☆☆☆")
+
+    def item_rects(self, option):
+        # محاسبه محل اجزا به صورت چپ‌به‌راست و سپس قرینه کردن برای چیدمان راست‌به‌چپ
+        style = option.widget.style() if option.widget else QApplication.style()
+        rect = option.rect
+        indicator = style.pixelMetric(QStyle.PixelMetric.PM_IndicatorWidth)
+        check_rect = QRect(rect.left() + 4, rect.top() + (rect.height() - indicator) // 2, indicator, indicator)
+        stars_rect = QRect(rect.right() - self.stars_width - 4, rect.top(), self.stars_width, rect.height())
+        title_rect = QRect(check_rect.right() + 8, rect.top(),
+                           stars_rect.left() - check_rect.right() - 12, rect.height())
+        return [QStyle.visualRect(option.direction, rect, r) for r in (check_rect, title_rect, stars_rect)]
+
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget else QApplication.style()
+        painter.save()
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, option.widget)
+        check_rect, title_rect, stars_rect = self.item_rects(option)
+
+        # چک‌باکس
+        check_option = QStyleOptionButton()
+        check_option.rect = check_rect
+        check_option.state = QStyle.StateFlag.State_Enabled
+        if index.data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Checked:
+            check_option.state |= QStyle.StateFlag.State_On
+        else:
+            check_option.state |= QStyle.StateFlag.State_Off
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_IndicatorCheckBox, check_option, painter, option.widget)
+
+        # عنوان تسک
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.setPen(option.palette.color(QPalette.ColorRole.HighlightedText))
+        else:
+            painter.setPen(option.palette.color(QPalette.ColorRole.Text))
+        painter.setFont(option.font)
+        title = index.data(Qt.ItemDataRole.DisplayRole) or ""
+        if index.data(TodoListModel.IdRole) < 0:
+            # تکرار یک کار تکرارشونده
+            title = "↻ " + title
+        title = option.fontMetrics.elidedText(title, Qt.TextElideMode.ElideRight, title_rect.width())
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeading, title)
+
+        # ستاره‌های اولویت
+        painter.setFont(self.star_font)
+        painter.drawText(stars_rect, Qt.AlignmentFlag.AlignCenter,
+                         self.stars_text(index.data(TodoListModel.PriorityRole)))
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        height = max(option.fontMetrics.height(), self.star_metrics.height()) + 8
+        return QSize(option.rect.width(), height)
+
+    def editorEvent(self, event, model, option, index):
+        # کلید Space (یا Select) مثل چک‌باکس‌های قبلی وضعیت تسک فعلی را عوض می‌کند
+        if event.type() == QEvent.Type.KeyPress:
+            if event.key() in (Qt.Key.Key_Space, Qt.Key.Key_Select):
+                return self.toggle(model, index)
+            return False
+        if event.type() != QEvent.Type.MouseButtonRelease or event.button() != Qt.MouseButton.LeftButton:
+            return False
+        check_rect, title_rect, _ = self.item_rects(option)
+        position = event.position().toPoint()
+        if check_rect.adjusted(-4, -4, 4, 4).contains(position):
+            return self.toggle(model, index)
+        if title_rect.contains(position):
+            self.title_clicked.emit(index)
+        return False
+
+    def toggle(self, model, index):
+        checked = index.data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Checked
+        new_state = Qt.CheckState.Unchecked if checked else Qt.CheckState.Checked
+        return model.setData(index, new_state.value, Qt.ItemDataRole.CheckStateRole)
+
+class DatePickerDialog(QDialog):
+    # پنجره انتخاب تاریخ شمسی (برای انتقال تسک‌ها)
+    def __init__(self, jdate, font, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("انتخاب تاریخ")
+        self.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
+        
+        self.calendar = JalaliCalendarWidget()
+        self.calendar.setGridVisible(True)
+        gregorian_date = jdate.togregorian()
+        self.calendar.setSelectedDate(QDate(gregorian_date.year, gregorian_date.month, gregorian_date.day))
+        self.calendar.header_label.setFont(font)
+        
+        # دکمه‌های تایید و انصراف
+        buttons_layout = QHBoxLayout()
+        ok_button = QPushButton("انتقال")
+        ok_button.setFont(font)
+        ok_button.clicked.connect(self.accept)
+        cancel_button = QPushButton("انصراف")
+        cancel_button.setFont(font)
+        cancel_button.clicked.connect(self.reject)
+        buttons_layout.addWidget(ok_button)
+        buttons_layout.addWidget(cancel_button)
+        
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.calendar.header_label)
+        layout.addWidget(self.calendar)
+        layout.addLayout(buttons_layout)
+        
+    def selected_date_key(self):
+        return date_key(self.calendar.selectedDate())
+
+class DescriptionDialog(QDialog):
+    # پنجره نمایش توضیحات؛ یک بار ساخته و برای هر تسک دوباره استفاده می‌شود
+    def __init__(self, font, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("توضیحات تسک")
+        self.setMinimumWidth(400)
+        self.setMinimumHeight(300)
+        
+        # ایجاد لیبل برای نمایش توضیحات
+        self.desc_label = QTextEdit()
+        self.desc_label.setReadOnly(True)
+        self.desc_label.setFont(font)
+        
+        # ایجاد دکمه بستن
+        close_btn = QPushButton("بستن")
+        close_btn.setFont(font)
+        close_btn.clicked.connect(self.close)
+        
+        # تنظیم لایه‌بندی
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.desc_label)
+        layout.addWidget(close_btn)
+        
+    def show_description(self, description):
+        self.desc_label.setPlainText(description)
+        self.exec()
+
+def format_cache_stats(caches):
+    # یک خط برای هر کش (برای تنظیم اندازه‌ها)
+    return "\n".join(f"{name}: {stats['size']}/{stats['max_size']} hits {stats['hits']} misses {stats['misses']} "
+                     f"hit rate {stats['hit_rate']:.1%}"
+                     for name, stats in ((name, cache.stats()) for name, cache in caches.items()))
+
+
+class TraceSummaryDialog(QDialog):
+    # خلاصه صدک‌های زمان هر عملیات در حالت ردیابی و آمار کش‌ها، با امکان ذخیره فایل trace کروم
+    def __init__(self, font, caches, parent=None):
+        super().__init__(parent)
+        # نام -> LRUCache
+        self.caches = caches
+        self.setWindowTitle("خلاصه ردیابی")
+        self.setMinimumWidth(800)
+        self.setMinimumHeight(400)
+        
+        self.summary_text = QTextEdit()
+        self.summary_text.setReadOnly(True)
+        self.summary_text.setLayoutDirection(Qt.LayoutDirection.LeftToRight)
+        self.summary_text.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        self.summary_text.setFont(QFont("monospace", 9))
+        
+        self.status_label = QLabel()
+        self.status_label.setFont(font)
+        
+        refresh_btn = QPushButton("به‌روزرسانی")
+        refresh_btn.setFont(font)
+        refresh_btn.clicked.connect(self.refresh)
+        save_btn = QPushButton("ذخیره فایل trace")
+        save_btn.setFont(font)
+        save_btn.clicked.connect(self.save_trace)
+        
+        buttons = QHBoxLayout()
+        buttons.addWidget(refresh_btn)
+        buttons.addWidget(save_btn)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.summary_text)
+        layout.addWidget(self.status_label)
+        layout.addLayout(buttons)
+        
+    def refresh(self):
+        self.summary_text.setPlainText(TRACER.format_summary() + "\n\n" + format_cache_stats(self.caches))
+        
+    def save_trace(self):
+        self.status_label.setText(f"ذخیره شد: {os.path.abspath(TRACER.dump())}")
+        
+    def show_summary(self):
+        self.refresh()
+        self.status_label.clear()
+        self.show()
+        self.raise_()
+
+class EditTodoDialog(QDialog):
+    # پنجره ویرایش؛ یک بار ساخته و برای هر تسک با load پر می‌شود
+    def __init__(self, font, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("ویرایش تسک")
+        self.setMinimumWidth(400)
+        self.todo_id = None
+        
+        # ایجاد فرم ویرایش
+        form_layout = QVBoxLayout(self)
+        
+        # عنوان
+        title_layout = QHBoxLayout()
+        title_label = QLabel("عنوان:")
+        title_label.setFont(font)
+        title_layout.addWidget(title_label)
+        self.title_input = QLineEdit()
+        self.title_input.setFont(font)
+        title_layout.addWidget(self.title_input)
+        form_layout.addLayout(title_layout)
+        
+        # توضیحات
+        desc_layout = QVBoxLayout()
+        desc_label = QLabel("توضیحات:")
+        desc_label.setFont(font)
+        desc_layout.addWidget(desc_label)
+        self.desc_input = QTextEdit()
+        self.desc_input.setFont(font)
+        desc_layout.addWidget(self.desc_input)
+        form_layout.addLayout(desc_layout)
+        
+        # اولویت
+        priority_layout = QHBoxLayout()
+        priority_label = QLabel("اولویت:")
+        priority_label.setFont(font)
+        priority_layout.addWidget(priority_label)
+        self.priority_combo = QComboBox()
+        self.priority_combo.setFont(font)
+        self.priority_combo.addItems(["کم", "متوسط", "زیاد"])
+        priority_layout.addWidget(self.priority_combo)
+        # زمان یادآوری در روز همین تسک
+        self.due_check = QCheckBox("یادآوری:")
+        self.due_check.setFont(font)
+        priority_layout.addWidget(self.due_check)
+        self.due_input = QTimeEdit()
+        self.due_input.setFont(font)
+        self.due_input.setDisplayFormat("HH:mm")
+        self.due_check.toggled.connect(self.due_input.setEnabled)
+        priority_layout.addWidget(self.due_input)
+        form_layout.addLayout(priority_layout)
+        
+        # دکمه‌های ذخیره و انصراف
+        buttons_layout = QHBoxLayout()
+        self.save_button = QPushButton("ذخیره")
+        self.save_button.setFont(font)
+        cancel_button = QPushButton("انصراف")
+        cancel_button.setFont(font)
+        buttons_layout.addWidget(self.save_button)
+        buttons_layout.addWidget(cancel_button)
+        form_layout.addLayout(buttons_layout)
+        cancel_button.clicked.connect(self.reject)
+        
+    def load(self, todo, due=None):
+        self.todo_id = todo[0]
+        self.todo = todo
+        self.title_input.setText(todo[2])
+        self.desc_input.setPlainText(todo[3] or "")
+        self.priority_combo.setCurrentIndex(todo[4])
+        # تکرارها یادآوری ندارند
+        self.due_check.setEnabled(todo[0] > 0)
+        self.due_check.setChecked(due is not None)
+        self.due_input.setEnabled(due is not None)
+        self.due_input.setTime(QTime(*time_from_timestamp(due)) if due is not None else QTime(9, 0))
+        self.title_input.setFocus()
+        
+    def due(self):
+        # زمان یونیکس یادآوری یا None
+        if not self.due_check.isChecked():
+            return None
+        due_time = self.due_input.time()
+        return timestamp_from_key(self.todo[1], due_time.hour(), due_time.minute())
+
+class TodoApp(QMainWindow):
+    # تعداد روزهایی که نتیجه‌شان در حافظه نگه داشته می‌شود
+    DAY_CACHE_SIZE = 64
+    # مکث پس از آخرین کلید تا شروع جستجو (میلی‌ثانیه)
+    SEARCH_DELAY_MS = 250
+    # فاصله بررسی تغییرات برنامه‌های دیگری که همین دیتابیس را باز کرده‌اند (میلی‌ثانیه)
+    WATCH_INTERVAL_MS = 1000
+    # تاخیر نوشتن تیک‌ها و ویرایش‌ها؛ تغییرات این فاصله با یک commit نوشته می‌شوند
+    WRITE_DELAY_MS = 300
+    # اگر تعداد روزهای تغییرکرده بیشتر از این باشد، به جای به‌روزرسانی تک‌تک روزها همه چیز دوباره خوانده می‌شود
+    MAX_PATCHED_DAYS = 31
+    # مدت نمایش پیام‌های نوار وضعیت (میلی‌ثانیه)
+    STATUS_TIMEOUT_MS = 10000
+    # نماهای دستور کار؛ اندیس‌ها همان ترتیب گزینه‌های agenda_combo هستند
+    AGENDA_OFF, AGENDA_WEEK, AGENDA_MONTH, AGENDA_OVERDUE = range(4)
+    AGENDA_MODES = ("بدون دستور کار", "این هفته", "این ماه", "عقب‌افتاده")
+    TRANSFER_FILTER = "CSV (*.csv);;JSON Lines (*.jsonl *.json);;iCalendar (*.ics)"
+    # گزینه‌های تکرار فرم افزودن؛ به ترتیب None و recurrence.FREQUENCIES
+    REPEAT_NAMES = ("بدون تکرار", "هر روز", "هر هفته", "هر ماه", "هر سال")
+
+    def __init__(self, profile=None, db_path=DB_PATH):
+        super().__init__()
+        self.profile = profile or StartupProfile()
+        self.db_path = db_path
+        self.setWindowTitle("برنامه مدیریت کارها")
+        self.setMinimumSize(1000, 600)
+        
+        # تنظیم فونت وزیر برای کل برنامه
+        self.vazir_font = QFont("Vazir", 10)
+        self.vazir_font.setBold(True)
+        self.setFont(self.vazir_font)
+        
+        # دیتابیس پس از نمایش پنجره در start باز می‌شود
+        self.repository = None
+        # پنجره‌های ویرایش و توضیحات در اولین استفاده ساخته می‌شوند
+        self.edit_dialog = None
+        self.description_dialog = None
+        self.trace_dialog = None
+        # اجرای کوئری‌های خواندنی در پس‌زمینه تا رابط کاربری هرگز منتظر دیتابیس نماند
+        self.executor = QueryExecutor(self)
+        # صف نوشتن تیک‌ها و ویرایش‌ها؛ هر کوئری پس‌زمینه پیش از اجرا آن را خالی می‌کند تا داده کهنه نبیند
+        self.writes = WriteQueue(lambda changes: self.repository.apply_changes(changes), self, self.WRITE_DELAY_MS)
+        self.writes.failed.connect(self.report_write_failure)
+        self.writes.flushed.connect(self.refresh_stale_counts)
+        # روزهای نیمه‌بارگذاری‌شده‌ای که شمارششان پس از نوشته شدن صف نوشتن (یا با تاخیر count_timer)
+        # دوباره خوانده می‌شود؛ تغییرات پشت‌سرهم یک روز فقط یک کوئری شمارش دارند
+        self.stale_counts = set()
+        self.count_timer = QTimer(self)
+        self.count_timer.setSingleShot(True)
+        self.count_timer.setInterval(self.WRITE_DELAY_MS)
+        self.count_timer.timeout.connect(self.refresh_stale_counts)
+        self.executor.barrier = self.writes.flush
+        self.executor.on_error = self.report_query_failure
+        # عملیات طولانی (درون‌ریزی، برون‌بری، بایگانی) یکی‌یکی روی نخ جداگانه، تا کوئری‌های رابط کاربری و
+        # پر کردن ستون day منتظر آن‌ها نمانند؛ رویدادهای لغو آن‌ها هنگام بستن برنامه فعال می‌شوند
+        self.jobs = QueryExecutor(self, max_threads=1)
+        self.jobs.barrier = self.writes.flush
+        self.job_cancels = set()
+        # یادآوری زمان انجام کارها؛ پیش از خواندن هر دسته، صف نوشتن خالی می‌شود
+        self.reminders = ReminderScheduler(self.load_reminders,
+                                           lambda todo_id: self.repository.reminder(todo_id), self)
+        self.reminders.reminder.connect(self.show_reminder)
+        self.tray_icon = None
+        # کش تعداد کارهای روزانه هر صفحه تقویم: (سال، ماه میلادی) -> (کلیدهای تاریخ صفحه، شمارش‌ها)
+        self.day_counts_cache = LRUCache(12)
+        # کش نتیجه روزها: کلید تاریخ شمسی -> ردیف‌های آن روز
+        self.day_cache = LRUCache(self.DAY_CACHE_SIZE)
+        # تسکی که پس از پرش به تاریخ نتیجه جستجو باید انتخاب شود
+        self.focus_todo_id = None
+        self.focus_date = None
+        # علامت first_paint پروفایل راه‌اندازی در اولین paintEvent
+        self.painted = False
+        # توقف پر کردن ستون day در پس‌زمینه هنگام بستن برنامه
+        self.closing = threading.Event()
+        # آخرین data_version دیده‌شده؛ در start مقداردهی می‌شود (شماره آخرین تغییر در repository.change_cursor است)
+        self.data_version = None
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setInterval(self.WATCH_INTERVAL_MS)
+        self.watch_timer.timeout.connect(self.check_external_changes)
+        
+        # تنظیم تم پیش‌فرض
+        self.is_dark_mode = False
+        self.setup_ui()
+        self.apply_light_theme()
+        
+        # تنظیم تاریخ امروز (بدون ارسال سیگنال؛ داده‌ها در start خوانده می‌شوند)
+        today = jdatetime.date.today()
+        gregorian_date = today.togregorian()
+        self.calendar.blockSignals(True)
+        self.calendar.setSelectedDate(QDate(gregorian_date.year, gregorian_date.month, gregorian_date.day))
+        self.calendar.blockSignals(False)
+        self.calendar.update_header()
+        self.profile.mark("ui")
+        
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            self.profile.mark("first_paint")
+
+    def start(self):
+        # پس از اولین نمایش پنجره: مهاجرت‌ها در پس‌زمینه، سپس باز کردن دیتابیس و بارگذاری اولیه.
+        # تا باز شدن دیتابیس پنجره فقط نمایش داده می‌شود
+        self.centralWidget().setEnabled(False)
+        self.executor.submit("open", TodoRepository.prepare, self.db_path,
+                             on_result=lambda _: self.open_repository(), on_error=self.report_open_failure,
+                             priority=1)
+
+    def report_open_failure(self, error):
+        QMessageBox.critical(self, "خطا", f"خطا در باز کردن دیتابیس: {error}")
+        self.close()
+
+    def open_repository(self):
+        # پنجره ممکن است پیش از پایان مهاجرت‌ها بسته شده باشد
+        if self.closing.is_set():
+            return
+        self.repository = TodoRepository(self.db_path)
+        self.profile.mark("schema")
+        self.centralWidget().setEnabled(True)
+        if self.profile.enabled:
+            self.todo_model.modelReset.connect(self.finish_startup_profile)
+        self.load_todos()
+        self.refresh_day_counts()
+        self.data_version = self.repository.data_version()
+        self.repository.change_cursor = self.repository.last_change()
+        self.watch_timer.start()
+        self.reminders.reload()
+        if not self.repository.days_ready:
+            # دیتابیس‌های قدیمی: پر کردن شماره روز ردیف‌ها در دسته‌های کوچک، بدون معطل کردن رابط کاربری
+            self.executor.submit("backfill", self.repository.backfill_days, None, self.closing.is_set,
+                                 on_result=lambda filled: self.refresh_agenda(), priority=-1)
+        
+    def finish_startup_profile(self):
+        self.todo_model.modelReset.disconnect(self.finish_startup_profile)
+        self.profile.mark("first_load")
+        self.profile.report()
+        
+    def closeEvent(self, event):
+        if self.repository is not None and not self.save_pending_writes():
+            event.ignore()
+            return
+        self.watch_timer.stop()
+        self.reminders.stop()
+        self.closing.set()
+        for cancelled in self.job_cancels:
+            cancelled.set()
+        # نتیجه عملیات لغوشده پس از بسته شدن دیتابیس تحویل داده نمی‌شود
+        self.jobs.cancel("job")
+        self.jobs.wait()
+        self.executor.wait()
+        log.debug("cache stats\n%s", format_cache_stats(self.caches()))
+        if self.repository is not None:
+            self.repository.close()
+        super().closeEvent(event)
+        
+    def save_pending_writes(self):
+        # نوشتن صف پیش از بستن. در صورت خطا تغییرات در صف می‌مانند و کاربر بین ماندن (و بستن دوباره برای
+        # تلاش دوباره) و بستن بدون ذخیره انتخاب می‌کند؛ failed مسدود است تا reload_all دوباره صف را ننویسد
+        self.writes.blockSignals(True)
+        try:
+            if self.writes.flush(retain=True):
+                return True
+        finally:
+            self.writes.blockSignals(False)
+        reply = QMessageBox.question(self, "خطا",
+                                     f"تغییرات {len(self.writes.pending)} تسک ذخیره نشد: {self.writes.error}\n"
+                                     "برنامه بدون ذخیره این تغییرات بسته شود؟",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                     QMessageBox.StandardButton.No)
+        return reply == QMessageBox.StandardButton.Yes
+        
+    def setup_ui(self):
+        # ویجت اصلی
+        main_widget = QWidget()
+        self.setCentralWidget(main_widget)
+        layout = QHBoxLayout(main_widget)
+        
+        # سمت راست: تقویم
+        right_panel = QWidget()
+        right_layout = QVBoxLayout(right_panel)
+        
+        # ایجاد تقویم
+        self.calendar = JalaliCalendarWidget()
+        self.calendar.setGridVisible(True)
+        # با کلیک یا کلیدهای جهت‌نما؛ نتیجه روزهایی که کاربر از آن‌ها رد شده دور ریخته می‌شود
+        self.calendar.selectionChanged.connect(self.load_todos)
+        self.calendar.currentPageChanged.connect(self.refresh_day_counts)
+        
+        # اضافه کردن لیبل تاریخ شمسی
+        self.calendar.header_label.setFont(self.vazir_font)
+        right_layout.addWidget(self.calendar.header_label)
+        right_layout.addWidget(self.calendar)
+        
+        # دکمه‌های عملیات
+        button_layout = QHBoxLayout()
+        
+        # دکمه افزودن
+        add_button = QPushButton("افزودن")
+        add_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogNewFolder))
+        add_button.clicked.connect(self.add_todo)
+        add_button.setFont(self.vazir_font)
+        
+        # دکمه ویرایش
+        edit_button = QPushButton("ویرایش")
+        edit_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogDetailedView))
+        edit_button.clicked.connect(self.edit_todo)
+        edit_button.setFont(self.vazir_font)
+        
+        # دکمه حذف
+        delete_button = QPushButton("حذف")
+        delete_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_TrashIcon))
+        delete_button.clicked.connect(self.delete_todo)
+        delete_button.setFont(self.vazir_font)
+        
+        # دکمه حذف همه
+        delete_all_button = QPushButton("حذف همه")
+        delete_all_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogResetButton))
+        delete_all_button.clicked.connect(self.delete_all_todos)
+        delete_all_button.setFont(self.vazir_font)
+        
+        button_layout.addWidget(add_button)
+        button_layout.addWidget(edit_button)
+        button_layout.addWidget(delete_button)
+        button_layout.addWidget(delete_all_button)
+        button_layout.addStretch()
+        
+        # دکمه تغییر تم
+        theme_button = QPushButton("تغییر تم")
+        theme_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_ComputerIcon))
+        theme_button.clicked.connect(self.toggle_theme)
+        theme_button.setFont(self.vazir_font)
+        button_layout.addWidget(theme_button)
+        
+        right_layout.addLayout(button_layout)
+        
+        # دکمه‌های درون‌ریزی و برون‌بری (CSV، JSON Lines و iCalendar)
+        transfer_layout = QHBoxLayout()
+        import_button = QPushButton("درون‌ریزی")
+        import_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton))
+        import_button.clicked.connect(self.import_todos)
+        import_button.setFont(self.vazir_font)
+        export_button = QPushButton("برون‌بری")
+        export_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton))
+        export_button.clicked.connect(self.export_todos)
+        export_button.setFont(self.vazir_font)
+        archive_button = QPushButton("بایگانی")
+        archive_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DriveHDIcon))
+        archive_button.clicked.connect(self.archive_todos)
+        archive_button.setFont(self.vazir_font)
+        transfer_layout.addWidget(import_button)
+        transfer_layout.addWidget(export_button)
+        transfer_layout.addWidget(archive_button)
+        transfer_layout.addStretch()
+        right_layout.addLayout(transfer_layout)
+        
+        layout.addWidget(right_panel)
+        
+        # سمت چپ: لیست کارها و فرم
+        left_panel = QWidget()
+        left_layout = QVBoxLayout(left_panel)
+        
+        # لیست کارها
+        # مدل و نمای لیست: فقط ردیف‌های قابل مشاهده رسم می‌شوند
+        self.todo_model = TodoListModel(self)
+        self.todo_model.completion_changed.connect(self.toggle_todo_status)
+        self.todo_model.page_requested.connect(self.load_next_page)
+        self.todo_delegate = TodoItemDelegate(self)
+        self.todo_delegate.title_clicked.connect(
+            lambda index: self.load_description(index.data(TodoListModel.IdRole)))
+        self.todo_list = QListView()
+        self.todo_list.setFont(self.vazir_font)
+        self.todo_list.setModel(self.todo_model)
+        self.todo_list.setItemDelegate(self.todo_delegate)
+        self.todo_list.setUniformItemSizes(True)
+        # انتخاب چند تسک برای عملیات گروهی از طریق منوی راست‌کلیک
+        self.todo_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.todo_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.todo_list.customContextMenuRequested.connect(self.show_todo_menu)
+        delete_shortcut = QShortcut(QKeySequence(QKeySequence.StandardKey.Delete), self.todo_list)
+        delete_shortcut.activated.connect(self.delete_todo)
+        if TRACER.enabled:
+            trace_shortcut = QShortcut(QKeySequence("Ctrl+Shift+T"), self)
+            trace_shortcut.activated.connect(self.show_trace_summary)
+        self.todo_model.modelReset.connect(self.focus_pending_todo)
+        
+        # جستجو در همه کارها؛ پس از مکث کوتاه در تایپ و در پس‌زمینه اجرا می‌شود
+        self.search_input = QLineEdit()
+        self.search_input.setFont(self.vazir_font)
+        self.search_input.setPlaceholderText("جستجو در همه کارها...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(lambda text: self.search_timer.start())
+        self.search_results = QListWidget()
+        self.search_results.setFont(self.vazir_font)
+        self.search_results.setMaximumHeight(200)
+        self.search_results.itemClicked.connect(self.open_search_result)
+        self.search_results.itemActivated.connect(self.open_search_result)
+        self.search_results.hide()
+        left_layout.addWidget(self.search_input)
+        left_layout.addWidget(self.search_results)
+        
+        # دستور کار: کارهای هفته یا ماه روز انتخاب‌شده یا کارهای عقب‌افتاده، به صورت تدریجی بارگذاری می‌شود
+        self.agenda_combo = QComboBox()
+        self.agenda_combo.setFont(self.vazir_font)
+        self.agenda_combo.addItems(self.AGENDA_MODES)
+        self.agenda_combo.currentIndexChanged.connect(self.refresh_agenda)
+        self.agenda_model = AgendaModel(self)
+        self.agenda_model.page_requested.connect(self.load_next_agenda_page)
+        # بازه فعلی دستور کار: (اولین روز، آخرین روز، فقط انجام‌نشده‌ها)
+        self.agenda_query = None
+        self.agenda_list = QListView()
+        self.agenda_list.setModel(self.agenda_model)
+        self.agenda_list.setFont(self.vazir_font)
+        self.agenda_list.setMaximumHeight(250)
+        self.agenda_list.setUniformItemSizes(True)
+        self.agenda_list.clicked.connect(self.open_search_result)
+        self.agenda_list.activated.connect(self.open_search_result)
+        self.agenda_list.hide()
+        self.agenda_timer = QTimer(self)
+        self.agenda_timer.setSingleShot(True)
+        self.agenda_timer.setInterval(self.SEARCH_DELAY_MS)
+        self.agenda_timer.timeout.connect(self.refresh_agenda)
+        self.calendar.selectionChanged.connect(self.follow_agenda_date)
+        left_layout.addWidget(self.agenda_combo)
+        left_layout.addWidget(self.agenda_list)
+        
+        left_layout.addWidget(QLabel("کارهای امروز:"))
+        left_layout.addWidget(self.todo_list)
+        
+        # فرم اضافه کردن کار جدید
+        form_layout = QVBoxLayout()
+        
+        # عنوان
+        title_layout = QHBoxLayout()
+        title_label = QLabel("عنوان:")
+        title_label.setFont(self.vazir_font)
+        title_layout.addWidget(title_label)
+        self.title_input = QLineEdit()
+        self.title_input.setFont(self.vazir_font)
+        title_layout.addWidget(self.title_input)
+        form_layout.addLayout(title_layout)
+        
+        # توضیحات
+        desc_layout = QVBoxLayout()
+        desc_label = QLabel("توضیحات:")
+        desc_label.setFont(self.vazir_font)
+        desc_layout.addWidget(desc_label)
+        self.desc_input = QTextEdit()
+        self.desc_input.setFont(self.vazir_font)
+        desc_layout.addWidget(self.desc_input)
+        form_layout.addLayout(desc_layout)
+        
+        # اولویت
+        priority_layout = QHBoxLayout()
+        priority_label = QLabel("اولویت:")
+        priority_label.setFont(self.vazir_font)
+        priority_layout.addWidget(priority_label)
+        self.priority_combo = QComboBox()
+        self.priority_combo.setFont(self.vazir_font)
+        self.priority_combo.addItems(["کم", "متوسط", "زیاد"])
+        priority_layout.addWidget(self.priority_combo)
+        # تکرار از روز انتخاب‌شده: همان روز هفته، همان روز ماه یا همان روز سال (مثلا نوروز)
+        repeat_label = QLabel("تکرار:")
+        repeat_label.setFont(self.vazir_font)
+        priority_layout.addWidget(repeat_label)
+        self.repeat_combo = QComboBox()
+        self.repeat_combo.setFont(self.vazir_font)
+        self.repeat_combo.addItems(self.REPEAT_NAMES)
+        priority_layout.addWidget(self.repeat_combo)
+        # زمان یادآوری در روز انتخاب‌شده؛ فقط برای کارهای بدون تکرار
+        self.due_check = QCheckBox("یادآوری:")
+        self.due_check.setFont(self.vazir_font)
+        priority_layout.addWidget(self.due_check)
+        self.due_input = QTimeEdit(QTime(9, 0))
+        self.due_input.setFont(self.vazir_font)
+        self.due_input.setDisplayFormat("HH:mm")
+        self.due_input.setEnabled(False)
+        self.due_check.toggled.connect(self.due_input.setEnabled)
+        self.repeat_combo.currentIndexChanged.connect(lambda repeat: self.due_check.setEnabled(not repeat))
+        priority_layout.addWidget(self.due_input)
+        form_layout.addLayout(priority_layout)
+        
+        # دکمه‌ها
+        buttons_layout = QHBoxLayout()
+        self.add_btn = QPushButton("اضافه کردن")
+        self.add_btn.setFont(self.vazir_font)
+        self.add_btn.clicked.connect(self.add_todo)
+        buttons_layout.addWidget(self.add_btn)
+        
+        left_layout.addLayout(form_layout)
+        layout.addWidget(left_panel)
+        
+        # تنظیم راست به چپ
+        main_widget.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
+        
+    def apply_light_theme(self):
+        palette = QPalette()
+        palette.setColor(QPalette.ColorRole.Window, QColor(240, 240, 240))
+        palette.setColor(QPalette.ColorRole.WindowText, QColor(0, 0, 0))
+        palette.setColor(QPalette.ColorRole.Base, QColor(255, 255, 255))
+        palette.setColor(QPalette.ColorRole.AlternateBase, QColor(233, 233, 233))
+        palette.setColor(QPalette.ColorRole.Text, QColor(0, 0, 0))
+        self.setPalette(palette)
+        
+    def apply_dark_theme(self):
+        palette = QPalette()
+        palette.setColor(QPalette.ColorRole.Window, QColor(53, 53, 53))
+        palette.setColor(QPalette.ColorRole.WindowText, QColor(255, 255, 255))
+        palette.setColor(QPalette.ColorRole.Base, QColor(25, 25, 25))
+        palette.setColor(QPalette.ColorRole.AlternateBase, QColor(53, 53, 53))
+        palette.setColor(QPalette.ColorRole.Text, QColor(255, 255, 255))
+        self.setPalette(palette)
+        
+    def toggle_theme(self):
+        self.is_dark_mode = not self.is_dark_mode
+        self.calendar.is_dark_mode = self.is_dark_mode
+        if self.is_dark_mode:
+            self.apply_dark_theme()
+        else:
+            self.apply_light_theme()
+            
+    def load_todos(self, date=None):
+        # تا باز شدن دیتابیس، open_repository روز انتخاب‌شده را بارگذاری می‌کند
+        if self.repository is None:
+            return
+        # تبدیل تاریخ شمسی به میلادی برای ذخیره در دیتابیس
+        jdate = self.calendar.selectedDate()
+        date_str = date_key(jdate)
+        
+        with TRACER.span("load_todos", "app", date=date_str):
+            # صفحه در راه لیست قبلی نباید به این لیست اضافه شود
+            self.executor.cancel("page")
+            cached = self.day_cache.get(date_str)
+            if cached is not None:
+                # نتیجه در راه روز قبلی نباید لیست را بازنویسی کند
+                self.executor.cancel("day")
+                self.todo_model.set_todos(cached, date_str)
+            else:
+                self.executor.submit("day", self.repository.day_page, date_str, 0, self.repository.DAY_PAGE,
+                                     on_result=lambda page: self.store_day(date_str, *page, show=True),
+                                     priority=1)
+            self.prefetch_days(jdate)
+        
+    def store_day(self, date_str, todos, next_after=None, show=False):
+        # فقط روزهایی که کامل خوانده شده‌اند کش می‌شوند تا حافظه روزهای بزرگ به اندازه بخش دیده‌شده بماند
+        if next_after is None:
+            self.day_cache.put(date_str, todos)
+        if show:
+            self.todo_model.set_todos(todos, date_str, next_after)
+        
+    def load_next_page(self, date_str, after):
+        self.executor.submit("page", self.repository.day_page, date_str, after, self.repository.DAY_PAGE,
+                             on_result=lambda page: self.append_day_page(date_str, *page), priority=1)
+        
+    def append_day_page(self, date_str, todos, next_after):
+        if self.todo_model.date_str != date_str:
+            return
+        self.todo_model.append_page(todos, next_after)
+        if next_after is None:
+            # روز کامل شد و از این به بعد مثل روزهای کوچک کش می‌شود
+            self.day_cache.put(date_str, list(self.todo_model.todos))
+        if self.focus_todo_id is not None:
+            self.focus_pending_todo()
+        
+    def prefetch_days(self, jdate):
+        # روز قبل و بعد و بقیه روزهای هفته (شنبه تا جمعه) در پس‌زمینه خوانده می‌شوند
+        ordinal = jdate.togregorian().toordinal()
+        week_start = ordinal - jdate.weekday()
+        for neighbour in (ordinal - 1, ordinal + 1, *range(week_start, week_start + 7)):
+            date_str = date_key(self.calendar.date_cache.get(neighbour))
+            channel = f"prefetch:{date_str}"
+            if neighbour == ordinal or date_str in self.day_cache or self.executor.pending(channel):
+                continue
+            self.executor.submit(channel, self.repository.day_page, date_str, 0, self.repository.DAY_PAGE,
+                                 on_result=lambda page, date_str=date_str: self.store_day(date_str, *page))
+        
+    def patch_day(self, date_str, added=(), updated=(), removed_ids=(), clear=False):
+        # اعمال یک تغییر فقط روی ردیف‌های تغییرکرده در کش روز و لیست، بدون خواندن دوباره کل روز
+        updated = {todo[0]: todo for todo in updated}
+        removed_ids = set(removed_ids)
+        cached = self.day_cache.peek(date_str)
+        if clear:
+            self.day_cache.put(date_str, [])
+        elif cached is not None:
+            if updated or removed_ids:
+                cached[:] = [updated.get(todo[0], todo) for todo in cached if todo[0] not in removed_ids]
+            cached.extend(added)
+            # ردیف‌های منتقل‌شده از روزهای دیگر ممکن است شناسه کوچک‌تری داشته باشند
+            if added and len(cached) > len(added) and cached[-len(added) - 1][0] > added[0][0]:
+                cached.sort(key=lambda todo: todo[0])
+        # پیش‌خوانی در راه این روز ممکن است پیش از این تغییر خوانده شده باشد
+        self.executor.cancel(f"prefetch:{date_str}")
+        if self.executor.pending(f"changed:{date_str}"):
+            self.refresh_changed_day(date_str)
+        
+        if self.todo_model.date_str == date_str and clear:
+            self.todo_model.set_todos([], date_str)
+        elif self.todo_model.date_str == date_str:
+            self.todo_model.remove_todos(removed_ids)
+            for todo in updated.values():
+                self.todo_model.update_todo(todo)
+            for todo in added:
+                self.todo_model.insert_todo(todo)
+        elif date_str == date_key(self.calendar.selectedDate()) and self.executor.pending("day"):
+            self.load_todos()
+        # اگر همه ردیف‌های روز در حافظه است شمارش از همان‌ها حساب می‌شود (تغییرات صف نوشتن هنوز در دیتابیس نیستند)
+        if self.todo_model.date_str != date_str:
+            self.invalidate_day_counts(date_str, self.day_cache.peek(date_str))
+        elif self.todo_model.next_after is None:
+            self.invalidate_day_counts(date_str, self.todo_model.todos)
+        else:
+            # روز نیمه‌بارگذاری‌شده: شمارش پس از نوشته شدن صف، یا اگر صف خالی است با کمی تاخیر، در پس‌زمینه
+            # از دیتابیس خوانده می‌شود
+            self.stale_counts.add(date_str)
+            if not self.writes.pending:
+                self.count_timer.start()
+        if self.agenda_combo.currentIndex() != self.AGENDA_OFF:
+            self.agenda_timer.start()
+            
+    def run_search(self):
+        text = self.search_input.text()
+        if not search_terms(text):
+            self.executor.cancel("search")
+            self.search_results.clear()
+            self.search_results.hide()
+            return
+        self.executor.submit("search", self.repository.search, text,
+                             on_result=self.show_search_results, priority=1)
+        
+    def show_search_results(self, rows):
+        self.search_results.clear()
+        for todo_id, date_str, title in rows:
+            item = QListWidgetItem(f"{title}  ({date_str})")
+            item.setData(Qt.ItemDataRole.UserRole, (todo_id, date_str))
+            if day_ordinal(date_str) is None:
+                # ردیف با تاریخ نامعتبر (ذخیره‌شده با UNKNOWN_DAY) در هیچ روز تقویم نیست و پرش ندارد
+                item.setFlags(Qt.ItemFlag.NoItemFlags)
+            self.search_results.addItem(item)
+        if not rows:
+            item = QListWidgetItem("نتیجه‌ای یافت نشد")
+            item.setFlags(Qt.ItemFlag.NoItemFlags)
+            self.search_results.addItem(item)
+        self.search_results.show()
+        
+    def open_search_result(self, item):
+        data = item.data(Qt.ItemDataRole.UserRole)
+        if not data:
+            return
+        todo_id, date_str = data
+        day = day_ordinal(date_str)
+        if day is None:
+            return
+        # پرش تقویم به تاریخ تسک؛ پس از بارگذاری آن روز، تسک انتخاب می‌شود
+        self.focus_todo_id = todo_id
+        self.focus_date = date_str
+        self.calendar.setSelectedDate(QDate.fromJulianDay(day + JULIAN_DAY_OFFSET))
+        self.focus_pending_todo()
+        
+    def focus_pending_todo(self):
+        # با هر بارگذاری روز صدا زده می‌شود؛ فقط وقتی پرشی از جستجو در انتظار است و روز مقصد نمایش داده می‌شود
+        if self.focus_todo_id is None or self.todo_model.date_str != self.focus_date:
+            return
+        row = self.todo_model.rows_by_id.get(self.focus_todo_id)
+        if row is None:
+            # ممکن است تسک در صفحه‌های بعدی یک روز بزرگ باشد؛ صفحه‌ها به ترتیب شناسه‌اند، پس فقط تا رسیدن
+            # به شناسه تسک صفحه بعدی خوانده می‌شود و اگر تسک در این روز نباشد پرش رها می‌شود
+            next_after = self.todo_model.next_after
+            if next_after is None or self.focus_todo_id <= next_after:
+                self.focus_todo_id = None
+            elif self.todo_model.canFetchMore():
+                self.todo_model.fetchMore()
+            return
+        self.focus_todo_id = None
+        index = self.todo_model.index(row)
+        self.todo_list.setCurrentIndex(index)
+        self.todo_list.scrollTo(index)
+        
+    def check_external_changes(self):
+        # PRAGMA data_version فقط با commit اتصال‌های دیگر عوض می‌شود؛ در غیر این صورت کاری انجام نمی‌شود
+        version = self.repository.data_version()
+        if version == self.data_version:
+            return
+        self.data_version = version
+        # خواندن change_log در نخ پس‌زمینه؛ تغییرات خود برنامه قبلا با change_cursor رد شده‌اند
+        self.executor.submit("changes", self.repository.changed_days, self.repository.change_cursor,
+                             on_result=self.apply_external_changes)
+
+    def apply_external_changes(self, changes):
+        last, days = changes
+        self.repository.change_cursor = max(self.repository.change_cursor, last)
+        if not days:
+            return
+        self.reminders.reload()
+        if ALL_DAYS in days or len(days) > self.MAX_PATCHED_DAYS:
+            self.repository.occurrences.invalidate()
+            self.reload_all()
+            return
+        for day in days:
+            date_str = key_from_ordinal(day)
+            if date_str in self.day_cache or self.todo_model.date_str == date_str:
+                self.refresh_changed_day(date_str)
+            elif any(date_str in keys for _, (keys, _) in self.day_counts_cache.items()):
+                self.refresh_day_count(date_str)
+        if self.agenda_combo.currentIndex() != self.AGENDA_OFF:
+            self.agenda_timer.start()
+        
+    def refresh_changed_day(self, date_str):
+        self.executor.submit(f"changed:{date_str}", self.repository.todos_for_date, date_str,
+                             on_result=lambda todos: self.apply_changed_day(date_str, todos), priority=1)
+        
+    def apply_changed_day(self, date_str, todos):
+        # فقط تفاوت با نسخه در حافظه اعمال می‌شود تا انتخاب و موقعیت لیست حفظ شود
+        if self.todo_model.date_str == date_str:
+            current = self.todo_model.todos
+            last = self.todo_model.next_after
+            if last is not None:
+                # فقط ردیف‌های بارگذاری‌شده مقایسه می‌شوند؛ بقیه با اسکرول خوانده می‌شوند
+                todos = [todo for todo in todos if todo[0] <= last or todo[0] in self.todo_model.rows_by_id]
+        else:
+            current = self.day_cache.peek(date_str)
+        if current is None:
+            self.refresh_day_count(date_str)
+            return
+        old = {todo[0]: todo for todo in current}
+        new_ids = {todo[0] for todo in todos}
+        added = [todo for todo in todos if todo[0] not in old]
+        updated = [todo for todo in todos if todo[0] in old and old[todo[0]] != todo]
+        removed_ids = [todo_id for todo_id in old if todo_id not in new_ids]
+        if added or updated or removed_ids:
+            self.patch_day(date_str, added, updated, removed_ids)
+        
+    def refresh_agenda(self):
+        mode = self.agenda_combo.currentIndex()
+        self.agenda_timer.stop()
+        if mode == self.AGENDA_OFF or self.repository is None:
+            self.executor.cancel("agenda")
+            self.agenda_model.set_rows([], loaded=False)
+            self.agenda_list.hide()
+            return
+        if mode == self.AGENDA_OVERDUE:
+            self.agenda_query = (None, ordinal_from_key(today_key()) - 1, True)
+        else:
+            jdate = self.calendar.selectedDate()
+            bounds = week_range(jdate) if mode == self.AGENDA_WEEK else month_range(jdate)
+            self.agenda_query = (*bounds, False)
+        self.agenda_model.set_rows([], loaded=False)
+        self.agenda_list.show()
+        # فقط صفحه اول؛ بقیه با اسکرول (fetchMore) خوانده می‌شوند
+        self.executor.submit("agenda", self.repository.range_page, *self.agenda_query,
+                             on_result=lambda page: self.agenda_model.set_rows(*page), priority=1)
+        
+    def load_next_agenda_page(self, after):
+        # همان کانال refresh_agenda؛ صفحه‌ای که پس از تغییر بازه برسد دور ریخته می‌شود
+        self.executor.submit("agenda", self.repository.range_page, *self.agenda_query, after,
+                             on_result=lambda page: self.agenda_model.append_page(*page), priority=1)
+        
+    def follow_agenda_date(self):
+        if self.agenda_combo.currentIndex() in (self.AGENDA_WEEK, self.AGENDA_MONTH):
+            self.refresh_agenda()
+        
+    def refresh_day_counts(self, year=None, month=None):
+        # شمارش کارهای تمام روزهای صفحه فعلی تقویم با یک کوئری GROUP BY
+        if self.repository is None:
+            return
+        page = (self.calendar.yearShown(), self.calendar.monthShown())
+        cached = self.day_counts_cache.get(page)
+        if cached is not None:
+            self.calendar.set_day_counts(cached[1])
+            return
+        keys = {date_key(self.calendar.date_cache.get(ordinal)): ordinal for ordinal in grid_range(*page)}
+        self.calendar.set_day_counts({})
+        self.executor.submit("counts", self.repository.day_counts, min(keys), max(keys),
+                             on_result=lambda rows: self.apply_day_counts(page, keys, rows))
+        
+    def apply_day_counts(self, page, keys, rows):
+        counts = {keys[date_str]: (pending, completed) for date_str, pending, completed in rows}
+        self.day_counts_cache.put(page, (keys, counts))
+        if page == (self.calendar.yearShown(), self.calendar.monthShown()):
+            self.calendar.set_day_counts(counts)
+        
+    def refresh_day_count(self, date_str):
+        self.executor.submit(f"count:{date_str}", self.repository.day_counts, date_str, date_str,
+                             on_result=lambda rows: self.apply_day_count(date_str, rows))
+        
+    def invalidate_day_counts(self, date_str, todos=None):
+        # فقط شمارش همان روز در صفحه‌های کش‌شده‌ای که آن روز را نشان می‌دهند به‌روز می‌شود؛
+        # todos در صورت وجود همه ردیف‌های فعلی آن روز است و کوئری لازم نیست؛ در غیر این صورت شمارش در پس‌زمینه
+        # خوانده می‌شود
+        if todos is None:
+            self.refresh_day_count(date_str)
+            return
+        completed = sum(1 for todo in todos if todo[5])
+        rows = [(date_str, len(todos) - completed, completed)] if todos else []
+        self.apply_day_count(date_str, rows)
+        
+    def apply_day_count(self, date_str, rows):
+        ordinal = ordinal_from_key(date_str)
+        for page, (keys, counts) in self.day_counts_cache.items():
+            if date_str not in keys:
+                continue
+            if rows:
+                counts[ordinal] = (rows[0][1], rows[0][2])
+            else:
+                counts.pop(ordinal, None)
+        # اگر شمارش صفحه فعلی هنوز در راه است، ممکن است پیش از این تغییر خوانده شده باشد
+        if (self.calendar.yearShown(), self.calendar.monthShown()) not in self.day_counts_cache:
+            self.refresh_day_counts()
+        self.calendar.updateCells()
+        
+    def load_description(self, todo_id):
+        # توضیحات در لیست نگه داشته نمی‌شود و با کلیک روی عنوان از دیتابیس خوانده می‌شود
+        self.executor.submit("description", self.repository.get_description, todo_id,
+                             on_result=self.show_description, priority=1)
+        
+    def show_description(self, description):
+        if not description:
+            return
+            
+        if self.description_dialog is None:
+            self.description_dialog = DescriptionDialog(self.vazir_font, self)
+        self.description_dialog.show_description(description)
+        
+    def caches(self):
+        return {"day_cache": self.day_cache, "day_counts_cache": self.day_counts_cache}
+
+    def show_trace_summary(self):
+        if self.trace_dialog is None:
+            self.trace_dialog = TraceSummaryDialog(self.vazir_font, self.caches(), self)
+        self.trace_dialog.show_summary()
+        
+    def toggle_todo_status(self, todo_id, state):
+        # تبدیل state به مقدار صحیح برای ذخیره در دیتابیس؛ نوشتن با تاخیر و همراه تیک‌های بعدی انجام می‌شود
+        completed = 1 if state == Qt.CheckState.Checked.value else 0
+        self.writes.put(todo_id, completed=completed)
+        self.update_reminder(todo_id, completed)
+        
+        todo = self.todo_model.todo_by_id(todo_id)
+        self.patch_day(todo[1], updated=[todo[:5] + (completed,)])
+        
+    def update_reminder(self, todo_id, completed):
+        # کار انجام‌شده یادآوری نمی‌شود؛ با برگشتن به انجام‌نشده زمانش (شاید هنوز در صف نوشتن) دوباره زمان‌بندی می‌شود
+        if todo_id < 0:
+            return
+        if completed:
+            self.reminders.remove(todo_id)
+            return
+        pending = self.writes.pending.get(todo_id, {})
+        self.reminders.update(todo_id, pending['due'] if 'due' in pending else self.repository.get_due(todo_id))
+        
+    def load_reminders(self, after_due, after_id, limit):
+        self.writes.flush()
+        return self.repository.upcoming_reminders(after_due, after_id, limit)
+        
+    def show_reminder(self, todo_id, title):
+        # اعلان سیستم در صورت وجود، وگرنه پیام غیرمسدودکننده
+        QApplication.alert(self)
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            if self.tray_icon is None:
+                icon = self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxInformation)
+                self.tray_icon = QSystemTrayIcon(icon, self)
+                self.tray_icon.show()
+            self.tray_icon.showMessage("یادآوری", title)
+            return
+        message = QMessageBox(QMessageBox.Icon.Information, "یادآوری", title, parent=self)
+        message.setFont(self.vazir_font)
+        message.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        message.show()
+        
+    def refresh_stale_counts(self, changes=None):
+        self.count_timer.stop()
+        stale, self.stale_counts = self.stale_counts, set()
+        for date_str in stale:
+            self.refresh_day_count(date_str)
+        
+    def report_query_failure(self, channel, error):
+        # خطای کوئری‌های پس‌زمینه بدون on_error (روز، جستجو، شمارش‌ها)؛ نمایش فعلی دست نمی‌خورد
+        self.statusBar().showMessage(f"خطا در خواندن از دیتابیس: {error}", self.STATUS_TIMEOUT_MS)
+
+    def report_write_failure(self, changes, error):
+        # تغییرات نمایش‌داده‌شده ذخیره نشدند؛ نمایش دوباره از روی دیتابیس ساخته می‌شود
+        QMessageBox.critical(self, "خطا", f"خطا در ذخیره تغییرات {len(changes)} تسک: {error}")
+        self.reload_all()
+        
+    def add_todo(self):
+        jdate = self.calendar.selectedDate()
+        date_str = date_key(jdate)
+        title = self.title_input.text()
+        description = self.desc_input.toPlainText()
+        priority = self.priority_combo.currentIndex()
+        
+        if not title:
+            QMessageBox.warning(self, "خطا", "لطفا عنوان را وارد کنید")
+            return
+            
+        repeat = self.repeat_combo.currentIndex()
+        if repeat:
+            # یک قانون روی روزهای زیادی اثر دارد؛ کش‌ها دور ریخته و فقط بازه‌های در حال نمایش گسترش داده می‌شوند
+            self.repository.add_recurrence(date_str, title, description, priority, FREQUENCIES[repeat - 1])
+            self.repeat_combo.setCurrentIndex(0)
+            self.reload_all()
+        else:
+            due = None
+            if self.due_check.isChecked():
+                due_time = self.due_input.time()
+                due = timestamp_from_key(date_str, due_time.hour(), due_time.minute())
+            todo_id = self.repository.add_todo(date_str, title, description, priority, due)
+            self.reminders.update(todo_id, due)
+            self.patch_day(date_str, added=[(todo_id, date_str, title, None, priority, 0)])
+        
+        self.title_input.clear()
+        self.desc_input.clear()
+        self.due_check.setChecked(False)
+        
+    def selected_todos(self):
+        rows = sorted(index.row() for index in self.todo_list.selectionModel().selectedRows())
+        return [self.todo_model.todos[row] for row in rows]
+        
+    def show_todo_menu(self, position):
+        if not self.selected_todos():
+            return
+            
+        # منوی عملیات گروهی روی تسک‌های انتخاب‌شده
+        menu = QMenu(self)
+        menu.setFont(self.vazir_font)
+        menu.addAction("انجام شد", lambda: self.set_selected_completed(1))
+        menu.addAction("انجام نشده", lambda: self.set_selected_completed(0))
+        priority_menu = menu.addMenu("تغییر اولویت")
+        for priority, name in enumerate(["کم", "متوسط", "زیاد"]):
+            priority_menu.addAction(name, lambda priority=priority: self.set_selected_priority(priority))
+        menu.addAction("انتقال به تاریخ...", self.move_selected_todos)
+        menu.addSeparator()
+        menu.addAction("حذف", self.delete_todo)
+        if self.selected_recurrences():
+            menu.addAction("پایان تکرار از این روز", self.end_selected_recurrences)
+            menu.addAction("حذف همه تکرارها", self.delete_selected_recurrences)
+        menu.exec(self.todo_list.viewport().mapToGlobal(position))
+        
+    def set_selected_completed(self, completed):
+        todos = self.selected_todos()
+        if not todos:
+            return
+        for todo in todos:
+            self.writes.put(todo[0], completed=completed)
+            self.update_reminder(todo[0], completed)
+        self.patch_day(todos[0][1], updated=[todo[:5] + (completed,) for todo in todos])
+        
+    def set_selected_priority(self, priority):
+        todos = self.selected_todos()
+        if not todos:
+            return
+        for todo in todos:
+            self.writes.put(todo[0], priority=priority)
+        self.patch_day(todos[0][1], updated=[todo[:4] + (priority, todo[5]) for todo in todos])
+        
+    def move_selected_todos(self):
+        todos = self.selected_todos()
+        if not todos:
+            return
+            
+        dialog = DatePickerDialog(self.calendar.selectedDate(), self.vazir_font, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        source_date, target_date = todos[0][1], dialog.selected_date_key()
+        if target_date == source_date:
+            return
+            
+        todo_ids = [todo[0] for todo in todos]
+        self.writes.flush()
+        self.repository.move_many(todo_ids, target_date)
+        # زمان یادآوری همراه کار جابه‌جا شده است
+        self.reminders.reload()
+        self.patch_day(source_date, removed_ids=todo_ids)
+        self.patch_day(target_date, added=[(todo[0], target_date) + todo[2:] for todo in todos])
+        
+    def delete_todo(self):
+        todos = self.selected_todos()
+        if not todos:
+            return
+            
+        if len(todos) > 1:
+            reply = QMessageBox.question(self, 'تایید حذف',
+                                       f'آیا از حذف {len(todos)} تسک انتخاب‌شده اطمینان دارید؟',
+                                       QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+            
+        todo_ids = [todo[0] for todo in todos]
+        self.writes.flush()
+        self.repository.delete_many(todo_ids)
+        for todo_id in todo_ids:
+            self.reminders.remove(todo_id)
+        self.patch_day(todos[0][1], removed_ids=todo_ids)
+
+    def selected_recurrences(self):
+        # شناسه قانون -> روز اصلی اولین تکرار انتخاب‌شده از آن قانون
+        recurrences = {}
+        for todo in self.selected_todos():
+            if todo[0] < 0:
+                rule_id, day = split_occurrence_id(todo[0])
+                recurrences[rule_id] = min(day, recurrences.get(rule_id, day))
+        return recurrences
+        
+    def end_selected_recurrences(self):
+        self.writes.flush()
+        for rule_id, day in self.selected_recurrences().items():
+            self.repository.end_recurrence(rule_id, day - 1)
+        self.reload_all()
+        
+    def delete_selected_recurrences(self):
+        reply = QMessageBox.question(self, 'تایید حذف', 'آیا از حذف همه تکرارهای این کار اطمینان دارید؟',
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self.writes.flush()
+        for rule_id in self.selected_recurrences():
+            self.repository.delete_recurrence(rule_id)
+        self.reload_all()
+        
+    def delete_all_todos(self):
+        reply = QMessageBox.question(self, 'تایید حذف', 
+                                   'آیا از حذف تمام تسک‌های این روز اطمینان دارید؟',
+                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        
+        if reply == QMessageBox.StandardButton.Yes:
+            jdate = self.calendar.selectedDate()
+            date_str = date_key(jdate)
+            
+            self.writes.flush()
+            self.repository.delete_by_date(date_str)
+            self.reminders.reload()
+            self.patch_day(date_str, clear=True)
+
+    def import_todos(self):
+        path, _ = QFileDialog.getOpenFileName(self, "درون‌ریزی کارها", "", self.TRANSFER_FILTER)
+        if path:
+            self.run_transfer(transfer.import_file, path, "در حال درون‌ریزی...")
+        
+    def export_todos(self):
+        path, _ = QFileDialog.getSaveFileName(self, "برون‌بری کارها", "todos.csv", self.TRANSFER_FILTER)
+        if path:
+            self.run_transfer(transfer.export_file, path, "در حال برون‌بری...")
+        
+    def run_transfer(self, operation, path, label):
+        # اجرای درون‌ریزی/برون‌بری در پس‌زمینه با نوار پیشرفت و امکان لغو
+        try:
+            transfer.format_from_path(path)
+        except ValueError as e:
+            QMessageBox.warning(self, "خطا", str(e))
+            return
+            
+        def done(report, error):
+            if operation is transfer.import_file:
+                # دسته‌های درج‌شده پیش از لغو یا خطا باقی می‌مانند
+                self.reload_all()
+            if isinstance(error, transfer.TransferCancelled):
+                QMessageBox.information(self, "انتقال کارها", f"عملیات لغو شد ({error.args[0]} ردیف)")
+                return
+            if error is not None:
+                QMessageBox.critical(self, "خطا", f"خطا در انتقال کارها: {error}")
+                return
+            message = (f"{report['rows']} ردیف در {report['seconds']:.1f} ثانیه "
+                       f"({report['rows_per_second']:.0f} ردیف در ثانیه)")
+            if report['skipped']:
+                message += f"\n{report['skipped']} ردیف نامعتبر نادیده گرفته شد"
+            QMessageBox.information(self, "انتقال کارها", message)
+            
+        self._run_background_job("انتقال کارها", label, partial(operation, path, self.repository.path), done)
+        
+    def archive_todos(self):
+        # انتقال کارهای انجام‌شده قدیمی به دیتابیس بایگانی در پس‌زمینه؛ همچنان در تقویم و جستجو دیده می‌شوند
+        days, accepted = QInputDialog.getInt(self, "بایگانی کارها", "بایگانی کارهای انجام‌شده قدیمی‌تر از (روز):",
+                                             ARCHIVE_AGE_DAYS, 1, 100000)
+        if not accepted:
+            return
+            
+        def done(report, error):
+            # دسته‌های منتقل‌شده پیش از خطا باقی می‌مانند
+            self.reload_all()
+            if error is not None:
+                QMessageBox.critical(self, "خطا", f"خطا در بایگانی کارها: {error}")
+                return
+            megabyte = 1024 * 1024
+            QMessageBox.information(self, "بایگانی کارها",
+                                    f"{report['rows']} کار در {report['seconds']:.1f} ثانیه بایگانی شد\n"
+                                    f"فضای آزادشده: {report['bytes_reclaimed'] / megabyte:.1f} مگابایت\n"
+                                    f"حجم دیتابیس: {report['bytes_after'] / megabyte:.1f} مگابایت، "
+                                    f"بایگانی: {report['archive_bytes'] / megabyte:.1f} مگابایت")
+            
+        self._run_background_job("بایگانی کارها", "در حال بایگانی...",
+                                  partial(self.repository.archive_completed, days), done)
+        
+    def _run_background_job(self, title, label, job, on_done):
+        # اجرای یک عملیات طولانی روی jobs با نوار پیشرفت و امکان لغو. job(progress=, is_cancelled=) در نخ
+        # پس‌زمینه اجرا می‌شود و on_done(report, error) پس از پایان آن (یکی از دو مقدار None است)
+        cancelled = threading.Event()
+        self.job_cancels.add(cancelled)
+        signals = ProgressSignals(self)
+        progress_dialog = QProgressDialog(label, "لغو", 0, 0, self)
+        progress_dialog.setWindowTitle(title)
+        progress_dialog.setFont(self.vazir_font)
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.canceled.connect(cancelled.set)
+        signals.progress.connect(lambda rows: progress_dialog.setLabelText(f"{label}\n{rows} ردیف"))
+        progress_dialog.show()
+        
+        def finish(report=None, error=None):
+            self.job_cancels.discard(cancelled)
+            progress_dialog.reset()
+            signals.deleteLater()
+            on_done(report, error)
+            
+        self.jobs.submit("job", partial(job, progress=signals.progress.emit, is_cancelled=cancelled.is_set),
+                         on_result=finish, on_error=lambda error: finish(error=error))
+        
+    def reload_all(self):
+        # پس از تغییرات گسترده، همه کش‌ها دور ریخته و روز و ماه فعلی دوباره خوانده می‌شوند
+        self.day_cache.clear()
+        self.day_counts_cache.clear()
+        # درون‌ریزی ممکن است قانون تکرار اضافه کرده باشد
+        self.repository.occurrences.invalidate()
+        self.refresh_day_counts()
+        self.load_todos()
+        self.refresh_agenda()
+        self.reminders.reload()
+        
+    def edit_todo(self):
+        selected = self.todo_model.todo_at(self.todo_list.currentIndex())
+        if not selected:
+            QMessageBox.warning(self, "خطا", "لطفا یک تسک را برای ویرایش انتخاب کنید")
+            return
+            
+        # دریافت اطلاعات تسک از دیتابیس (پس از نوشتن تغییرات در صف)
+        self.writes.flush()
+        todo = self.repository.get_todo(selected[0])
+        
+        if not todo:
+            return
+            
+        if self.edit_dialog is None:
+            dialog = self.edit_dialog = EditTodoDialog(self.vazir_font, self)
+            # اتصال دکمه ذخیره
+            dialog.save_button.clicked.connect(lambda: self.save_edited_todo(dialog, dialog.todo_id,
+                                                                             dialog.title_input.text(),
+                                                                             dialog.desc_input.toPlainText(),
+                                                                             dialog.priority_combo.currentIndex(),
+                                                                             dialog.due()))
+        self.edit_dialog.load(todo, self.repository.get_due(todo[0]))
+        self.edit_dialog.exec()
+        
+    def save_edited_todo(self, dialog, todo_id, title, description, priority, due=None):
+        if not title:
+            QMessageBox.warning(self, "خطا", "لطفا عنوان را وارد کنید")
+            return
+            
+        self.writes.put(todo_id, title=title, description=description, priority=priority)
+        if todo_id > 0:
+            self.writes.put(todo_id, due=due)
+            self.reminders.update(todo_id, None if dialog.todo[5] else due)
+        old = self.todo_model.todo_by_id(todo_id)
+        if old is not None:
+            self.patch_day(old[1], updated=[(todo_id, old[1], title, None, priority, old[5])])
+        
+        dialog.accept()
+
+def run(argv, profile=None):
+    app = QApplication(argv)
+    app.setStyle('Fusion')
+    window = TodoApp(profile)
+    window.show()
+    # دیتابیس و داده‌ها پس از اولین نمایش پنجره بارگذاری می‌شوند
+    QTimer.singleShot(0, window.start)
+    return app.exec()
+
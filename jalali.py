@@ -0,0 +1,98 @@
+from datetime import date, datetime, time
+
+import jdatetime
+
+from cache import LRUCache
+
+MONTH_NAMES = ["فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور",
+               "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند"]
+
+
+def date_key(jdate):
+    # کلید تاریخ به همان شکلی که در ستون date ذخیره می‌شود
+    return f"{jdate.year}-{jdate.month:02d}-{jdate.day:02d}"
+
+
+def today_key():
+    return date_key(jdatetime.date.today())
+
+
+def ordinal_from_key(date_str):
+    # تبدیل کلید تاریخ شمسی به شماره روز میلادی
+    year, month, day = (int(part) for part in date_str.split("-"))
+    return jdatetime.date(year, month, day).togregorian().toordinal()
+
+
+def gregorian_from_key(date_str):
+    return date.fromordinal(ordinal_from_key(date_str))
+
+
+def timestamp_from_key(date_str, hour, minute):
+    # زمان یونیکس ساعت hour:minute (به وقت محلی) روز date_str؛ برای ستون due
+    return int(datetime.combine(gregorian_from_key(date_str), time(hour, minute)).timestamp())
+
+
+def time_from_timestamp(timestamp):
+    # (ساعت، دقیقه) محلی یک زمان یونیکس
+    moment = datetime.fromtimestamp(timestamp)
+    return moment.hour, moment.minute
+
+
+def key_from_gregorian(gregorian_date):
+    return date_key(jdatetime.date.fromgregorian(date=gregorian_date))
+
+
+def key_from_ordinal(ordinal):
+    return key_from_gregorian(date.fromordinal(ordinal))
+
+
+def days_in_month(year, month):
+    if month == 12:
+        return 30 if jdatetime.date(year, 1, 1).isleap() else 29
+    return jdatetime.j_days_in_month[month - 1]
+
+
+def week_range(jdate):
+    # شماره روز اول و آخر هفته (شنبه تا جمعه) شامل jdate
+    first = jdate.togregorian().toordinal() - jdate.weekday()
+    return first, first + 6
+
+
+def month_range(jdate):
+    # شماره روز اول و آخر ماه شمسی شامل jdate
+    first = jdatetime.date(jdate.year, jdate.month, 1).togregorian().toordinal()
+    return first, first + days_in_month(jdate.year, jdate.month) - 1
+
+
+def grid_range(year, month):
+    # شماره روزهای میلادی خانه‌های صفحه‌ای از تقویم که ماه میلادی year/month را نشان می‌دهد؛
+    # ۴۹ روز یعنی یک هفته حاشیه برای ماه‌هایی که از اول هفته شروع می‌شوند
+    first = date(year, month, 1).toordinal()
+    return range(first - 7, first + 42)
+
+
+class JalaliDateCache:
+    # تقویم حداکثر ۶ هفته نمایش می‌دهد (به grid_range نگاه کنید)
+    GRID_DAYS = 49
+
+    def __init__(self, max_pages=4):
+        # کلید، شماره روز میلادی (date.toordinal) است
+        self._cache = LRUCache(self.GRID_DAYS * max_pages)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, ordinal):
+        jdate = self._cache.get(ordinal)
+        if jdate is None:
+            jdate = jdatetime.date.fromgregorian(date=date.fromordinal(ordinal))
+            self._cache.put(ordinal, jdate)
+        return jdate
+
+    def fill_grid(self, year, month):
+        # تبدیل یکجای تمام خانه‌های صفحه ماه میلادی نمایش داده شده در تقویم
+        for ordinal in grid_range(year, month):
+            self.get(ordinal)
+
+    def clear(self):
+        self._cache.clear()
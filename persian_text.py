@@ -0,0 +1,27 @@
+# یکسان‌سازی متن فارسی برای جستجو: حروف عربی، نیم‌فاصله، اعراب و ارقام فارسی/عربی
+_TRANSLATION = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    # نیم‌فاصله حذف می‌شود تا «می‌روم» و «میروم» یکسان باشند
+    '‌': None, '‍': None,
+    # کشیده و اعراب
+    'ـ': None,
+    **{chr(code): None for code in range(0x064B, 0x0653)},
+    'ٰ': None,
+    **{persian: str(digit) for digit, persian in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    **{arabic: str(digit) for digit, arabic in enumerate('٠١٢٣٤٥٦٧٨٩')},
+})
+
+
+def normalize(text):
+    if not text:
+        return ''
+    return text.translate(_TRANSLATION).lower()
+
+
+def search_terms(text):
+    # تبدیل متن جستجو به عبارت MATCH در FTS5: هر کلمه به صورت پیشوندی و همه با هم (AND)
+    terms = [term for term in normalize(text).split() if any(char.isalnum() for char in term)]
+    return ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
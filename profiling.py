@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+# فعال‌سازی با متغیر محیطی TODO_PROFILE_STARTUP=1 یا گزینه --profile-startup
+PROFILE_ENV = 'TODO_PROFILE_STARTUP'
+PROFILE_FLAG = '--profile-startup'
+
+
+class StartupProfile:
+    # زمان هر مرحله راه‌اندازی از آخرین علامت تا علامت بعدی؛ در حالت غیرفعال هیچ کاری انجام نمی‌دهد
+    def __init__(self, enabled=False, started=None):
+        self.enabled = enabled
+        self.started = started if started is not None else time.perf_counter()
+        self.last = self.started
+        self.phases = []
+
+    @classmethod
+    def from_argv(cls, argv, started=None):
+        # گزینه --profile-startup از argv حذف می‌شود تا به Qt نرسد
+        enabled = os.environ.get(PROFILE_ENV, '') not in ('', '0')
+        if PROFILE_FLAG in argv:
+            argv.remove(PROFILE_FLAG)
+            enabled = True
+        return cls(enabled, started)
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self, stream=None):
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        for name, seconds in self.phases:
+            print(f"{name:>12}: {seconds * 1000:8.1f} ms", file=stream)
+        print(f"{'interactive':>12}: {(self.last - self.started) * 1000:8.1f} ms", file=stream)
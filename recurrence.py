@@ -0,0 +1,127 @@
+import threading
+from datetime import date
+
+import jdatetime
+
+from cache import LRUCache
+from jalali import days_in_month
+
+# کارهای تکرارشونده فقط به صورت قانون ذخیره می‌شوند و تکرارهای هر بازه هنگام نمایش ساخته می‌شوند.
+# هر قانون از روز شروعش تکرار می‌شود: هفتگی در همان روز هفته، ماهانه در همان روز ماه شمسی و سالانه
+# در همان روز و ماه (مثلا قانون سالانه‌ای که از ۱ فروردین شروع شود هر نوروز تکرار می‌شود).
+FREQUENCIES = ('daily', 'weekly', 'monthly', 'yearly')
+
+# شناسه هر تکرار در رابط کاربری منفی است تا با شناسه ردیف‌های todos تداخل نداشته باشد:
+# -(شناسه قانون × OCCURRENCE_BASE + شماره روز اصلی تکرار)
+OCCURRENCE_BASE = 1_000_000
+
+
+def occurrence_id(rule_id, day):
+    return -(rule_id * OCCURRENCE_BASE + day)
+
+
+def split_occurrence_id(todo_id):
+    # (شناسه قانون، شماره روز اصلی)
+    return divmod(-todo_id, OCCURRENCE_BASE)
+
+
+def split_ids(todo_ids):
+    # جدا کردن شناسه‌های ردیف‌های معمولی از تکرارها
+    rows, occurrences = [], []
+    for todo_id in todo_ids:
+        if todo_id < 0:
+            occurrences.append(split_occurrence_id(todo_id))
+        else:
+            rows.append(todo_id)
+    return rows, occurrences
+
+
+def _jalali(ordinal):
+    return jdatetime.date.fromgregorian(date=date.fromordinal(ordinal))
+
+
+def _ordinal(year, month, day):
+    # روزهای بیشتر از طول ماه به آخرین روز همان ماه منتقل می‌شوند (مثلا ۳۱ام در مهر یا ۳۰ اسفند)
+    day = min(day, days_in_month(year, month))
+    return jdatetime.date(year, month, day).togregorian().toordinal()
+
+
+class Rule:
+    # یک ردیف جدول recurrences
+    def __init__(self, rule_id, title, description, priority, frequency, interval, start_day, end_day):
+        self.id = rule_id
+        self.title = title
+        self.description = description
+        self.priority = priority
+        self.frequency = frequency
+        self.interval = max(interval or 1, 1)
+        self.start_day = start_day
+        self.end_day = end_day
+        self.start = _jalali(start_day)
+
+    def days(self, first, last):
+        # شماره روزهای تکرار در بازه [first, last] به ترتیب؛ فقط همان بازه محاسبه می‌شود
+        first = max(first, self.start_day)
+        if self.end_day is not None:
+            last = min(last, self.end_day)
+        if first > last:
+            return
+        if self.frequency in ('daily', 'weekly'):
+            step = self.interval * (7 if self.frequency == 'weekly' else 1)
+            day = self.start_day + -(-(first - self.start_day) // step) * step
+            yield from range(day, last + 1, step)
+        elif self.frequency == 'monthly':
+            low, high = _jalali(first), _jalali(last)
+            month_index = low.year * 12 + low.month - 1
+            start_index = self.start.year * 12 + self.start.month - 1
+            month_index += -(month_index - start_index) % self.interval
+            while month_index <= high.year * 12 + high.month - 1:
+                day = _ordinal(month_index // 12, month_index % 12 + 1, self.start.day)
+                if first <= day <= last:
+                    yield day
+                month_index += self.interval
+        elif self.frequency == 'yearly':
+            low, high = _jalali(first), _jalali(last)
+            year = low.year + -(low.year - self.start.year) % self.interval
+            while year <= high.year:
+                day = _ordinal(year, self.start.month, self.start.day)
+                if first <= day <= last:
+                    yield day
+                year += self.interval
+
+
+class OccurrenceCache:
+    # قانون‌ها یک بار خوانده می‌شوند و نتیجه گسترش هر بازه (صفحه تقویم یا یک روز) کش می‌شود.
+    # از نخ رابط کاربری و نخ‌های پس‌زمینه استفاده می‌شود، بنابراین با قفل محافظت می‌شود
+    def __init__(self, max_windows=64):
+        self.lock = threading.Lock()
+        self.rules = None
+        self.windows = LRUCache(max_windows)
+
+    def invalidate(self):
+        with self.lock:
+            self.rules = None
+            self.windows.clear()
+
+    def get_rules(self, load_rows):
+        # شناسه قانون -> Rule؛ load_rows در صورت نبود قانون‌ها در کش ردیف‌های جدول recurrences را برمی‌گرداند
+        with self.lock:
+            rules = self.rules
+        if rules is None:
+            rules = {row[0]: Rule(*row) for row in load_rows()}
+            with self.lock:
+                if self.rules is None:
+                    self.rules = rules
+        return rules
+
+    def expand(self, first, last, rules):
+        # [(روز، شناسه قانون)] مرتب بر اساس روز برای قانون‌هایی که get_rules برگردانده است
+        with self.lock:
+            cached = self.windows.get((first, last)) if self.rules is rules else None
+        if cached is not None:
+            return cached
+        occurrences = sorted((day, rule.id) for rule in rules.values() for day in rule.days(first, last))
+        with self.lock:
+            if self.rules is rules:
+                self.windows.put((first, last), occurrences)
+        return occurrences
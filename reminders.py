@@ -0,0 +1,105 @@
+import heapq
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from tracing import TRACER
+
+
+class ReminderScheduler(QObject):
+    # یادآوری زمان انجام کارها با یک تایمر تک‌ضرب برای نزدیک‌ترین زمان؛ بین دو یادآوری هیچ کاری انجام نمی‌شود.
+    # یادآوری‌ها در یک min-heap از (زمان، شناسه) نگه داشته و از ایندکس idx_todos_due دسته‌دسته خوانده می‌شوند:
+    # heap فقط تا مکان‌نمای آخرین دسته کامل است و دسته بعدی وقتی خوانده می‌شود که heap خالی شود.
+    # حذف و تغییر زمان تنبل است: ورودی‌هایی که با entries نمی‌خوانند هنگام رسیدن به سر heap دور ریخته می‌شوند
+    # (شناسه، عنوان)
+    reminder = pyqtSignal(int, str)
+
+    # تعداد یادآوری‌های هر دسته
+    BATCH_SIZE = 256
+    # حداکثر فاصله تایمر (میلی‌ثانیه)؛ پس از آن فقط دوباره تنظیم می‌شود تا تغییر ساعت سیستم هم دیده شود
+    MAX_DELAY_MS = 60 * 60 * 1000
+
+    def __init__(self, load, check, parent=None):
+        super().__init__(parent)
+        # load(after_due, after_id, limit) -> [(due, id, title)] و check(id) -> (due, title) یا None
+        self.load = load
+        self.check = check
+        self.heap = []
+        # شناسه -> زمان معتبر فعلی
+        self.entries = {}
+        # آخرین (زمان، شناسه) خوانده‌شده از دیتابیس و اینکه دسته دیگری باقی مانده است یا نه
+        self.cursor = (0, 0)
+        self.exhausted = True
+        # آخرین یادآوری نمایش‌داده‌شده تا پس از reload دوباره نمایش داده نشود
+        self.fired = (0, 0)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.fire)
+
+    def reload(self):
+        # خواندن دوباره از دیتابیس؛ پس از تغییرات گسترده (انتقال، حذف روز، تغییرات برنامه‌های دیگر)
+        self.heap = []
+        self.entries = {}
+        self.cursor = max((int(time.time()), 0), self.fired)
+        self.exhausted = False
+        self.arm()
+
+    def update(self, todo_id, due):
+        # زمان جدید یک کار؛ None یعنی بدون یادآوری
+        self.entries.pop(todo_id, None)
+        # زمان‌های گذشته یادآوری نمی‌شوند و زمان‌های بعد از مکان‌نما با دسته‌های بعدی از دیتابیس خوانده می‌شوند
+        if due is not None and due > time.time() and (self.exhausted or (due, todo_id) <= self.cursor):
+            self.entries[todo_id] = due
+            heapq.heappush(self.heap, (due, todo_id))
+        self.arm()
+
+    def remove(self, todo_id):
+        if self.entries.pop(todo_id, None) is not None:
+            self.arm()
+
+    def stop(self):
+        self.timer.stop()
+
+    def _top(self):
+        # نزدیک‌ترین یادآوری معتبر؛ ورودی‌های کهنه دور ریخته و در صورت خالی شدن heap دسته بعدی خوانده می‌شود
+        while True:
+            while self.heap and self.entries.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            if self.heap or self.exhausted:
+                return self.heap[0] if self.heap else None
+            self._load_batch()
+
+    def _load_batch(self):
+        with TRACER.span("load reminders", "app"):
+            rows = self.load(*self.cursor, self.BATCH_SIZE)
+        for due, todo_id, _ in rows:
+            self.entries[todo_id] = due
+            self.heap.append((due, todo_id))
+        heapq.heapify(self.heap)
+        if rows:
+            self.cursor = rows[-1][:2]
+        self.exhausted = len(rows) < self.BATCH_SIZE
+
+    def arm(self):
+        top = self._top()
+        if top is None:
+            self.timer.stop()
+            return
+        delay = max(0, int((top[0] - time.time()) * 1000))
+        self.timer.start(min(delay, self.MAX_DELAY_MS))
+
+    def fire(self):
+        now = time.time()
+        while True:
+            top = self._top()
+            if top is None or top[0] > now:
+                break
+            heapq.heappop(self.heap)
+            due, todo_id = top
+            del self.entries[todo_id]
+            self.fired = max(self.fired, top)
+            # heap ممکن است از تغییرات نوشته‌نشده یا برنامه‌های دیگر عقب باشد؛ وضعیت نهایی از دیتابیس خوانده می‌شود
+            current = self.check(todo_id)
+            if current is not None and current[0] == due:
+                self.reminder.emit(todo_id, current[1])
+        self.arm()
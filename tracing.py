@@ -0,0 +1,250 @@
+import atexit
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# فعال‌سازی با متغیر محیطی TODO_TRACE=1 (یا مسیر فایل خروجی) یا گزینه --trace[=مسیر]
+TRACE_ENV = 'TODO_TRACE'
+TRACE_FLAG = '--trace'
+DEFAULT_TRACE_PATH = 'todo-trace.json'
+# سقف رویدادهای نگه‌داشته‌شده؛ قدیمی‌ترها دور ریخته می‌شوند تا حافظه در اجرای طولانی رشد نکند
+MAX_EVENTS = 200000
+
+_NULL_SPAN = nullcontext()
+
+
+def percentile(ordered, fraction):
+    # روش nearest-rank روی لیست مرتب‌شده
+    return ordered[min(len(ordered) - 1, max(0, int(len(ordered) * fraction + 0.5) - 1))]
+
+
+class Span:
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.complete(self.name, self.category, self.started, time.perf_counter() - self.started,
+                             **self.args)
+        return False
+
+
+class SpanBatch:
+    # چند رویداد کوتاه پشت‌سرهم (مثل رسم خانه‌های یک صفحه تقویم) به صورت یک span ثبت می‌شوند
+    def __init__(self, tracer, name, category):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.started = None
+        self.ended = None
+        self.count = 0
+
+    def add(self, started, ended):
+        # True یعنی این اولین رویداد دسته است و فراخواننده باید flush را زمان‌بندی کند
+        first = self.started is None
+        if first:
+            self.started = started
+        self.ended = ended
+        self.count += 1
+        return first
+
+    def flush(self):
+        if self.started is None:
+            return
+        self.tracer.complete(self.name, self.category, self.started, self.ended - self.started, count=self.count)
+        self.started = None
+        self.count = 0
+
+
+class Tracer:
+    # ثبت span ها در حافظه؛ در حالت غیرفعال span یک context manager خالی است و چیزی ثبت نمی‌شود
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.thread_names = {}
+        self.lock = threading.Lock()
+
+    def configure(self, argv):
+        # گزینه --trace از argv حذف می‌شود تا به Qt و خط فرمان نرسد
+        path = os.environ.get(TRACE_ENV, '')
+        if path in ('', '0'):
+            path = None
+        elif path == '1':
+            path = DEFAULT_TRACE_PATH
+        for arg in list(argv[1:]):
+            if arg == TRACE_FLAG or arg.startswith(TRACE_FLAG + '='):
+                argv.remove(arg)
+                path = arg.partition('=')[2] or DEFAULT_TRACE_PATH
+        if path is not None:
+            self.enable(path)
+        return self.enabled
+
+    def enable(self, path=DEFAULT_TRACE_PATH):
+        if not self.enabled:
+            atexit.register(self.finish)
+        self.enabled = True
+        self.path = path
+
+    def span(self, name, category='app', **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+
+    def batch(self, name, category='app'):
+        return SpanBatch(self, name, category)
+
+    def complete(self, name, category, started, duration, **args):
+        thread = threading.current_thread()
+        with self.lock:
+            self.thread_names.setdefault(thread.ident, thread.name)
+            self.events.append((name, category, started, duration, thread.ident, args))
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.events)
+
+    def summary(self):
+        # (دسته، نام) -> تعداد، مجموع و صدک‌های ۵۰/۹۵/۹۹ به میلی‌ثانیه، مرتب بر اساس مجموع زمان
+        durations = {}
+        for name, category, _, duration, _, _ in self.snapshot():
+            durations.setdefault((category, name), []).append(duration * 1000)
+        rows = []
+        for (category, name), values in durations.items():
+            values.sort()
+            rows.append({'category': category, 'name': name, 'count': len(values), 'total_ms': sum(values),
+                         'p50_ms': percentile(values, 0.50), 'p95_ms': percentile(values, 0.95),
+                         'p99_ms': percentile(values, 0.99)})
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+    def format_summary(self, width=60):
+        lines = [f"{'operation':<{width}} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'total':>10}"]
+        for row in self.summary():
+            name = f"{row['category']}: {row['name']}"
+            if len(name) > width:
+                name = name[:width - 1] + '…'
+            lines.append(f"{name:<{width}} {row['count']:>7} {row['p50_ms']:>7.3f}ms {row['p95_ms']:>7.3f}ms "
+                         f"{row['p99_ms']:>7.3f}ms {row['total_ms']:>8.1f}ms")
+        return '\n'.join(lines)
+
+    def chrome_trace(self):
+        # قالب trace event کروم (قابل باز کردن در chrome://tracing و Perfetto)؛ زمان‌ها به میکروثانیه
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                  for tid, name in self.thread_names.items()]
+        for name, category, started, duration, tid, args in self.snapshot():
+            events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': (started - self.origin) * 1e6, 'dur': duration * 1e6, 'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path=None):
+        path = path or self.path or DEFAULT_TRACE_PATH
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+        return path
+
+    def finish(self):
+        # هنگام خروج برنامه: نوشتن فایل trace و چاپ خلاصه در stderr
+        if not self.enabled or not self.events:
+            return
+        path = self.dump()
+        print(self.format_summary(), file=sys.stderr)
+        print(f"trace: {path}", file=sys.stderr)
+
+
+TRACER = Tracer()
+
+
+# ردیابی دستورات SQL؛ فقط وقتی ردیابی فعال است اتصال‌ها با این کلاس‌ها ساخته می‌شوند
+
+def _statement(sql):
+    return ' '.join(sql.split())
+
+
+class TracedCursor(sqlite3.Cursor):
+    # زمان اجرا و خواندن ردیف‌ها جمع زده می‌شود و پس از آخرین fetch یک span ثبت می‌شود.
+    # زمانی که فراخواننده بین fetch ها صرف پردازش می‌کند در مدت span حساب نمی‌شود.
+    _sql = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._begin(sql, started)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._begin(sql, started)
+        return self
+
+    def _begin(self, sql, started):
+        self._sql = sql
+        self._started = started
+        self._elapsed = time.perf_counter() - started
+        self._rows = 0
+        if self.description is None:
+            # دستورات تغییر داده ردیفی برای خواندن ندارند
+            self._finish(max(self.rowcount, 0))
+
+    def _finish(self, rows):
+        if self._sql is not None:
+            TRACER.complete(_statement(self._sql), 'sql', self._started, self._elapsed, rows=rows)
+            self._sql = None
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        if self._sql is not None:
+            self._elapsed += time.perf_counter() - started
+            self._finish(self._rows + (row is not None))
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        if self._sql is not None:
+            self._elapsed += time.perf_counter() - started
+            self._rows += len(rows)
+            if len(rows) < size:
+                self._finish(self._rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        if self._sql is not None:
+            self._elapsed += time.perf_counter() - started
+            self._finish(self._rows + len(rows))
+        return rows
+
+    def __del__(self):
+        # نتیجه‌ای که هرگز خوانده نشد (مثل PRAGMA های تنظیمات)
+        if self._sql is not None:
+            self._finish(self._rows)
+
+
+class TracedConnection(sqlite3.Connection):
+    def execute(self, sql, parameters=()):
+        return self.cursor(TracedCursor).execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor(TracedCursor).executemany(sql, seq_of_parameters)
+
+
+def connection_factory():
+    return TracedConnection if TRACER.enabled else sqlite3.Connection
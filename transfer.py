@@ -0,0 +1,513 @@
+import csv
+import json
+import os
+import time
+from datetime import date, datetime, timezone
+from itertools import islice
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from database import DB_PATH, TodoRepository, day_date
+from jalali import gregorian_from_key, key_from_gregorian, ordinal_from_key, time_from_timestamp, timestamp_from_key
+from recurrence import FREQUENCIES
+
+# ستون‌های قابل انتقال؛ شناسه‌ها در درون‌ریزی دوباره ساخته می‌شوند. due ساعت یادآوری محلی (HH:MM) است
+FIELDS = ('date', 'title', 'description', 'priority', 'completed', 'due')
+# قانون‌های تکرار و استثناهای تکرارها رکوردهای جداگانه پس از کارها هستند: قانون با repeat و استثنا با occurrence
+# (تاریخ اصلی تکرار) شناخته می‌شود و rule آن‌ها را به هم وصل می‌کند. در استثنا date روز نمایش است و مقدار
+# خالی یعنی همان مقدار قانون. در CSV همه ستون‌ها در یک سرتیتر هستند
+RULE_FIELDS = ('date', 'title', 'description', 'priority', 'repeat', 'interval', 'until', 'rule')
+EXCEPTION_FIELDS = ('rule', 'occurrence', 'date', 'title', 'description', 'priority', 'completed', 'deleted')
+CSV_FIELDS = FIELDS + ('repeat', 'interval', 'until', 'rule', 'occurrence', 'deleted')
+FORMATS = ('csv', 'jsonl', 'ics')
+
+# نگاشت اولویت برنامه (۰ تا ۲) به PRIORITY در iCalendar (۱ بالاترین، ۹ پایین‌ترین)
+ICS_PRIORITIES = {2: 1, 1: 5, 0: 9}
+
+
+class TransferCancelled(Exception):
+    pass
+
+
+def format_from_path(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension == 'json':
+        extension = 'jsonl'
+    if extension not in FORMATS:
+        raise ValueError(f"قالب فایل پشتیبانی نمی‌شود: {path}")
+    return extension
+
+
+def _text(value):
+    # مقدار متنی یک فیلد؛ اعداد به متن تبدیل می‌شوند و شیء و آرایه JSON نامعتبرند
+    if isinstance(value, (dict, list)):
+        raise TypeError(value)
+    return '' if value is None else str(value)
+
+
+def _flag(value):
+    return 1 if str(value or 0).strip() in ('1', 'True', 'true') else 0
+
+
+def _optional(value, convert):
+    # مقدار یک فیلد استثنا؛ خالی یعنی همان مقدار قانون
+    return None if value is None or _text(value) == '' else convert(value)
+
+
+def _priority(value):
+    return min(max(int(value or 0), 0), 2)
+
+
+def clean_row(record):
+    # تبدیل یک رکورد خوانده‌شده به ردیف قابل درج؛ رکوردهای نامعتبر None برمی‌گردانند
+    try:
+        date_str = _text(record['date']).strip()
+        ordinal_from_key(date_str)
+        title = _text(record.get('title')).strip()
+        if not title:
+            return None
+        description = _text(record.get('description'))
+        priority = _priority(record.get('priority'))
+        completed = _flag(record.get('completed'))
+        due = _text(record.get('due')).strip()
+        if due:
+            hour, minute = (int(part) for part in due.split(':'))
+            due = timestamp_from_key(date_str, hour, minute)
+    except (KeyError, ValueError, TypeError):
+        return None
+    return (date_str, title, description, priority, completed, due or None)
+
+
+def clean_rule(record):
+    # ردیف قابل درج با insert_recurrences: (کلید، title, description, priority, frequency, interval, start_day, end_day)
+    try:
+        frequency = _text(record['repeat']).strip().lower()
+        title = _text(record.get('title')).strip()
+        if frequency not in FREQUENCIES or not title:
+            return None
+        start_day = ordinal_from_key(_text(record['date']).strip())
+        until = _text(record.get('until')).strip()
+        end_day = ordinal_from_key(until) if until else None
+        if end_day is not None and end_day < start_day:
+            return None
+        return (_text(record.get('rule')).strip(), title, _text(record.get('description')),
+                _priority(record.get('priority')), frequency, max(int(record.get('interval') or 1), 1),
+                start_day, end_day)
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def clean_exception(record):
+    # ردیف قابل درج با insert_recurrences: (کلید قانون، day, completed, title, description, priority, moved_day, deleted)
+    try:
+        key = _text(record.get('rule')).strip()
+        if not key:
+            return None
+        day = ordinal_from_key(_text(record['occurrence']).strip())
+        shown = _text(record.get('date')).strip()
+        moved_day = ordinal_from_key(shown) if shown else None
+        return (key, day, _optional(record.get('completed'), _flag), _optional(record.get('title'), _text),
+                _optional(record.get('description'), _text), _optional(record.get('priority'), _priority),
+                None if moved_day == day else moved_day, _flag(record.get('deleted')))
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def clean_records(records):
+    # جدا کردن کارها، قانون‌های تکرار و استثناها؛ (کارها، قانون‌ها، استثناها، تعداد رکوردهای نامعتبر)
+    rows, rules, exceptions = [], [], []
+    skipped = 0
+    for record in records:
+        if record.get('repeat'):
+            target, row = rules, clean_rule(record)
+        elif record.get('occurrence'):
+            target, row = exceptions, clean_exception(record)
+        else:
+            target, row = rows, clean_row(record)
+        if row is None:
+            skipped += 1
+        else:
+            target.append(row)
+    return rows, rules, exceptions, skipped
+
+
+def due_text(due):
+    # ساعت یادآوری به شکل HH:MM برای فایل‌ها؛ None برای کارهای بدون یادآوری
+    return None if due is None else '%02d:%02d' % time_from_timestamp(due)
+
+
+# خواندن فایل‌ها؛ همه به صورت generator تا کل فایل در حافظه بارگذاری نشود
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+
+def read_jsonl(path):
+    # خط خراب یا غیر شیء به شکل رکورد خالی برگردانده می‌شود تا مثل ردیف‌های نامعتبر CSV شمرده و رد شود
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = {}
+            yield record if isinstance(record, dict) else {}
+
+
+def _ics_unescape(value):
+    result = []
+    chars = iter(value)
+    for char in chars:
+        if char == '\\':
+            # بک‌اسلش تنها در انتهای مقدار همان‌طور باقی می‌ماند
+            escaped = next(chars, '\\')
+            result.append('\n' if escaped in 'nN' else escaped)
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def _ics_lines(f):
+    # باز کردن خطوط شکسته‌شده (خطوطی که با فاصله یا tab شروع می‌شوند ادامه خط قبل هستند)
+    current = None
+    for line in f:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def read_ics(path):
+    # اجزای تودرتو (مثل VALARM) نادیده گرفته می‌شوند تا END و DESCRIPTION آن‌ها جای مقادیر خود کار را نگیرد
+    with open(path, encoding='utf-8') as f:
+        component = None
+        depth = 0
+        for line in _ics_lines(f):
+            name, _, value = line.partition(':')
+            name, _, params = name.partition(';')
+            name = name.upper()
+            if component is None:
+                if name == 'BEGIN' and value.upper() in ('VTODO', 'VEVENT'):
+                    component = {}
+                    depth = 0
+            elif name == 'BEGIN':
+                depth += 1
+            elif name == 'END' and depth:
+                depth -= 1
+            elif name == 'END':
+                yield component
+                component = None
+            elif not depth:
+                if name == 'EXDATE' and name in component:
+                    # EXDATE ممکن است در چند خط بیاید
+                    value = f'{component[name][1]},{value}'
+                component[name] = (params, value)
+
+
+def _ics_time(params, value):
+    # زمان محلی یک DATE-TIME؛ با پسوند Z یا پارامتر TZID به منطقه زمانی سیستم تبدیل می‌شود و بدون آن‌ها
+    # (زمان شناور، همان چیزی که ics_lines می‌نویسد) همان‌طور خوانده می‌شود
+    moment = datetime.strptime(value[:15], '%Y%m%dT%H%M%S')
+    if value.upper().endswith('Z'):
+        return moment.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    for param in params.split(';'):
+        key, _, tzid = param.partition('=')
+        if key.upper() == 'TZID':
+            try:
+                return moment.replace(tzinfo=ZoneInfo(tzid.strip('"'))).astimezone().replace(tzinfo=None)
+            except (ZoneInfoNotFoundError, ValueError):
+                break
+    return moment
+
+
+def _ics_date(params, value):
+    # روز (محلی) یک DATE یا DATE-TIME
+    if 'T' in value:
+        return _ics_time(params, value).date()
+    return datetime.strptime(value[:8], '%Y%m%d').date()
+
+
+def ics_record(component):
+    # تبدیل یک VTODO/VEVENT به رکورد با تاریخ شمسی؛ DTSTART با ساعت، زمان یادآوری کار است
+    start = component.get('DTSTART') or component.get('DUE')
+    due = None
+    try:
+        gregorian = _ics_date(*start)
+        if 'T' in start[1]:
+            due = f'{_ics_time(*start):%H:%M}'
+        ics_priority = int(component.get('PRIORITY', ('', '0'))[1] or 0)
+    except (TypeError, ValueError):
+        return {}
+    if ics_priority == 0:
+        priority = 0
+    else:
+        priority = 2 if ics_priority <= 4 else 1 if ics_priority == 5 else 0
+    return {
+        'date': key_from_gregorian(gregorian),
+        'title': _ics_unescape(component.get('SUMMARY', ('', ''))[1]),
+        'description': _ics_unescape(component.get('DESCRIPTION', ('', ''))[1]),
+        'priority': priority,
+        'completed': 1 if component.get('STATUS', ('', ''))[1].upper() == 'COMPLETED' else 0,
+        'due': due,
+    }
+
+
+def ics_rule(value):
+    # فیلدهای repeat، interval و until یک RRULE، یا None برای قانون‌هایی که برنامه نمی‌تواند نگه دارد
+    # (مثل COUNT، BYDAY یا ماهانه و سالانه میلادی)؛ این‌ها مثل قبل یک کار تکی درون‌ریزی می‌شوند
+    parts = dict(part.partition('=')[::2] for part in value.upper().split(';') if part)
+    frequency = parts.pop('FREQ', '').lower()
+    scale = parts.pop('RSCALE', 'GREGORIAN')
+    parts.pop('WKST', None)
+    if (frequency not in FREQUENCIES or scale not in ('GREGORIAN', 'PERSIAN')
+            or (frequency in ('monthly', 'yearly') and scale != 'PERSIAN')
+            or parts.pop('SKIP', 'BACKWARD') != 'BACKWARD' or set(parts) - {'INTERVAL', 'UNTIL'}):
+        return None
+    try:
+        interval = int(parts.get('INTERVAL', 1))
+        until = key_from_gregorian(_ics_date('', parts['UNTIL'])) if 'UNTIL' in parts else None
+    except ValueError:
+        return None
+    return {'repeat': frequency, 'interval': interval, 'until': until}
+
+
+def ics_records(components):
+    # رکوردهای یک فایل iCalendar. جزء دارای RRULE قانون تکرار است و هر تاریخ EXDATE آن یک تکرار حذف‌شده؛
+    # جزء دارای RECURRENCE-ID استثنای یک تکرار است و اگر پیش از قانونش بیاید نامعتبر شمرده می‌شود
+    rules = {}
+    for component in components:
+        record = ics_record(component)
+        uid = component.get('UID', ('', ''))[1]
+        if 'RECURRENCE-ID' in component:
+            rule = rules.get(uid)
+            try:
+                occurrence = key_from_gregorian(_ics_date(*component['RECURRENCE-ID']))
+            except ValueError:
+                rule = None
+            if rule is None or not record:
+                yield {}
+                continue
+            # مقادیر برابر با قانون خالی می‌مانند تا ویرایش بعدی قانون روی این تکرار هم اعمال شود
+            yield {'rule': uid, 'occurrence': occurrence, 'date': record['date'], 'completed': record['completed'],
+                   **{field: None if record[field] == rule[field] else record[field]
+                      for field in ('title', 'description', 'priority')}}
+            continue
+        repeat = ics_rule(component.get('RRULE', ('', ''))[1]) if record else None
+        if repeat is None:
+            yield record
+            continue
+        record.update(repeat, rule=uid)
+        rules[uid] = record
+        yield record
+        params, value = component.get('EXDATE', ('', ''))
+        for exdate in filter(None, value.split(',')):
+            try:
+                yield {'rule': uid, 'occurrence': key_from_gregorian(_ics_date(params, exdate)), 'deleted': 1}
+            except ValueError:
+                yield {}
+
+
+def read_records(path, fmt=None):
+    fmt = fmt or format_from_path(path)
+    if fmt == 'csv':
+        return read_csv(path)
+    if fmt == 'jsonl':
+        return read_jsonl(path)
+    return ics_records(read_ics(path))
+
+
+# نوشتن فایل‌ها
+
+def _ics_escape(value):
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_fold(line):
+    # شکستن خطوط بلندتر از ۷۵ بایت بدون بریدن وسط کاراکترهای چندبایتی
+    parts = []
+    current, size = [], 0
+    for char in line:
+        length = len(char.encode('utf-8'))
+        if size + length > 75:
+            parts.append(''.join(current))
+            current, size = [' '], 1
+        current.append(char)
+        size += length
+    parts.append(''.join(current))
+    return '\r\n'.join(parts) + '\r\n'
+
+
+def _ics_task(title, description, priority, completed):
+    # انتهای مشترک یک VTODO
+    yield _ics_fold(f'SUMMARY:{_ics_escape(title)}')
+    if description:
+        yield _ics_fold(f'DESCRIPTION:{_ics_escape(description)}')
+    yield f'PRIORITY:{ICS_PRIORITIES.get(priority, 0)}\r\n'
+    yield f'STATUS:{"COMPLETED" if completed else "NEEDS-ACTION"}\r\n'
+    yield 'END:VTODO\r\n'
+
+
+def ics_rule_lines(rule, exceptions, stamp):
+    # قانون تکرار با RRULE؛ ماهانه و سالانه شمسی با RSCALE=PERSIAN (RFC 7529) و SKIP=BACKWARD که مثل
+    # recurrence._ordinal روزهای بیشتر از طول ماه را به آخرین روز ماه می‌برد. تکرارهای حذف‌شده EXDATE و
+    # تکرارهای تغییرکرده اجزای جداگانه با RECURRENCE-ID هستند
+    rule_id, title, description, priority, frequency, interval, start_day, end_day = rule
+    uid = f'UID:rule-{rule_id}@persian-todo-list\r\n'
+    parts = [f'FREQ={frequency.upper()}']
+    if frequency in ('monthly', 'yearly'):
+        parts = ['RSCALE=PERSIAN', *parts, 'SKIP=BACKWARD']
+    if interval > 1:
+        parts.append(f'INTERVAL={interval}')
+    if end_day is not None:
+        parts.append(f'UNTIL={date.fromordinal(end_day):%Y%m%d}')
+    yield 'BEGIN:VTODO\r\n'
+    yield uid
+    yield f'DTSTAMP:{stamp}\r\n'
+    yield f'DTSTART;VALUE=DATE:{date.fromordinal(start_day):%Y%m%d}\r\n'
+    yield f'RRULE:{";".join(parts)}\r\n'
+    deleted = [f'{date.fromordinal(exception[0]):%Y%m%d}' for exception in exceptions if exception[7]]
+    if deleted:
+        yield _ics_fold(f'EXDATE;VALUE=DATE:{",".join(deleted)}')
+    yield from _ics_task(title, description, priority, 0)
+    for day, _, completed, changed_title, changed_description, changed_priority, moved_day, deleted in exceptions:
+        if deleted:
+            continue
+        yield 'BEGIN:VTODO\r\n'
+        yield uid
+        yield f'DTSTAMP:{stamp}\r\n'
+        yield f'RECURRENCE-ID;VALUE=DATE:{date.fromordinal(day):%Y%m%d}\r\n'
+        yield f'DTSTART;VALUE=DATE:{date.fromordinal(day if moved_day is None else moved_day):%Y%m%d}\r\n'
+        yield from _ics_task(title if changed_title is None else changed_title,
+                             description if changed_description is None else changed_description,
+                             priority if changed_priority is None else changed_priority, completed)
+
+
+def ics_lines(todos, rules=()):
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    yield 'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//PersianToDoList//FA\r\n'
+    for todo_id, date_str, title, description, priority, completed, due in todos:
+        yield 'BEGIN:VTODO\r\n'
+        yield f'UID:todo-{todo_id}@persian-todo-list\r\n'
+        yield f'DTSTAMP:{stamp}\r\n'
+        if due is None:
+            yield f'DTSTART;VALUE=DATE:{gregorian_from_key(date_str):%Y%m%d}\r\n'
+        else:
+            # زمان شناور (بدون منطقه زمانی): همان ساعت محلی یادآوری در روز خود کار
+            hour, minute = time_from_timestamp(due)
+            yield f'DTSTART:{gregorian_from_key(date_str):%Y%m%d}T{hour:02d}{minute:02d}00\r\n'
+        yield from _ics_task(title, description, priority, completed)
+    for rule, exceptions in rules:
+        yield from ics_rule_lines(rule, exceptions, stamp)
+    yield 'END:VCALENDAR\r\n'
+
+
+def records(todos, rules):
+    # رکوردهای CSV و JSON Lines: کارها به شکل FIELDS و سپس هر قانون (RULE_FIELDS) با استثناهایش (EXCEPTION_FIELDS)
+    for todo in todos:
+        yield dict(zip(FIELDS, (*todo[1:-1], due_text(todo[-1]))))
+    for (rule_id, title, description, priority, frequency, interval, start_day, end_day), exceptions in rules:
+        yield dict(zip(RULE_FIELDS, (day_date(start_day), title, description, priority, frequency, interval,
+                                     None if end_day is None else day_date(end_day), rule_id)))
+        for day, _, completed, *changes, moved_day, deleted in exceptions:
+            yield dict(zip(EXCEPTION_FIELDS, (rule_id, day_date(day), day_date(day if moved_day is None else moved_day),
+                                              *changes, completed, deleted)))
+
+
+def write_todos(path, todos, fmt=None, rules=()):
+    # todos یک generator از ردیف‌های کامل جدول است و فقط یک بار پیمایش می‌شود؛ rules جفت‌های
+    # (قانون، استثناها) از iter_recurrences است
+    fmt = fmt or format_from_path(path)
+    newline = '' if fmt in ('csv', 'ics') else None
+    with open(path, 'w', newline=newline, encoding='utf-8') as f:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(records(todos, rules))
+        elif fmt == 'jsonl':
+            for record in records(todos, rules):
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            f.writelines(ics_lines(todos, rules))
+
+
+# درون‌ریزی و برون‌بری کامل با گزارش سرعت
+
+def _report(started, rows, skipped=0):
+    seconds = time.perf_counter() - started
+    return {'rows': rows, 'skipped': skipped, 'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else 0.0}
+
+
+def import_file(path, db_path=DB_PATH, fmt=None, chunk_size=5000, progress=None, is_cancelled=None):
+    # درج در تراکنش‌های chunk_size تایی؛ لغو بین دو تراکنش بررسی می‌شود و دسته‌های قبلی باقی می‌مانند.
+    # اتصال جداگانه دارد تا در نخ پس‌زمینه قابل اجرا باشد.
+    started = time.perf_counter()
+    repository = TodoRepository(db_path)
+    imported = skipped = 0
+    # کلید قانون در فایل -> شناسه جدید، برای استثناهایی که در دسته‌های بعدی می‌آیند
+    rule_ids = {}
+    try:
+        source = read_records(path, fmt)
+        while True:
+            if is_cancelled is not None and is_cancelled():
+                raise TransferCancelled(imported)
+            batch = list(islice(source, chunk_size))
+            if not batch:
+                break
+            rows, rules, exceptions, invalid = clean_records(batch)
+            skipped += invalid
+            if rows:
+                repository.insert_many(rows)
+                imported += len(rows)
+            if rules or exceptions:
+                orphans = repository.insert_recurrences(rules, exceptions, rule_ids)
+                skipped += orphans
+                imported += len(rules) + len(exceptions) - orphans
+            if progress is not None:
+                progress(imported)
+    finally:
+        repository.close()
+    return _report(started, imported, skipped)
+
+
+def export_file(path, db_path=DB_PATH, fmt=None, progress=None, is_cancelled=None, progress_every=5000):
+    started = time.perf_counter()
+    repository = TodoRepository(db_path)
+    exported = 0
+
+    def tracked(todos):
+        nonlocal exported
+        for todo in todos:
+            exported += 1
+            if exported % progress_every == 0:
+                if is_cancelled is not None and is_cancelled():
+                    raise TransferCancelled(exported)
+                if progress is not None:
+                    progress(exported)
+            yield todo
+
+    def counted(rules):
+        # قانون‌ها کم‌اند؛ فقط در شمارش گزارش می‌آیند
+        nonlocal exported
+        for rule, exceptions in rules:
+            exported += 1 + len(exceptions)
+            yield rule, exceptions
+
+    try:
+        write_todos(path, tracked(repository.iter_todos()), fmt, counted(repository.iter_recurrences()))
+    except TransferCancelled:
+        # فایل نیمه‌کاره باقی نمی‌ماند
+        os.remove(path)
+        raise
+    finally:
+        repository.close()
+    if progress is not None:
+        progress(exported)
+    return _report(started, exported)
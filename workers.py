@@ -0,0 +1,148 @@
+import logging
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from tracing import TRACER
+
+log = logging.getLogger(__name__)
+
+
+class QuerySignals(QObject):
+    # (کانال، نسل، نتیجه) — از نخ کارگر به نخ رابط کاربری منتقل می‌شوند
+    finished = pyqtSignal(str, int, object)
+    failed = pyqtSignal(str, int, object)
+
+
+class ProgressSignals(QObject):
+    # گزارش پیشرفت عملیات طولانی (مثل درون‌ریزی) از نخ کارگر
+    progress = pyqtSignal(int)
+
+
+class QueryTask(QRunnable):
+    def __init__(self, executor, channel, generation, func, args):
+        super().__init__()
+        self.executor = executor
+        self.channel = channel
+        self.generation = generation
+        self.func = func
+        self.args = args
+        self.signals = executor.signals
+
+    def run(self):
+        # اگر تا شروع اجرا درخواست جدیدتری در همین کانال آمده باشد، کوئری اصلا اجرا نمی‌شود
+        if not self.executor.is_current(self.channel, self.generation):
+            return
+        try:
+            result = self.func(*self.args)
+        except Exception as e:
+            self.signals.failed.emit(self.channel, self.generation, e)
+        else:
+            self.signals.finished.emit(self.channel, self.generation, result)
+
+
+class QueryExecutor(QObject):
+    # اجرای کوئری‌های خواندنی خارج از نخ رابط کاربری.
+    # هر کانال (مثلا "day") شماره نسل خودش را دارد و فقط نتیجه آخرین درخواست هر کانال تحویل داده می‌شود.
+    def __init__(self, parent=None, max_threads=2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        # نخ‌ها زنده می‌مانند تا اتصال‌های خواندنی هر نخ دوباره ساخته نشوند
+        self.pool.setExpiryTimeout(-1)
+        self.generations = {}
+        self.callbacks = {}
+        # تابعی که پیش از ارسال هر کوئری اجرا می‌شود (مثلا نوشتن تغییرات در صف) تا کوئری داده تازه را ببیند
+        self.barrier = None
+        # تابع (کانال، خطا) برای درخواست‌هایی که on_error ندارند (مثلا نمایش خطا در نوار وضعیت)
+        self.on_error = None
+        self.signals = QuerySignals(self)
+        self.signals.finished.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+
+    def submit(self, channel, func, *args, on_result=None, on_error=None, priority=0):
+        if self.barrier is not None:
+            self.barrier()
+        generation = self.cancel(channel)
+        self.callbacks[(channel, generation)] = (on_result, on_error)
+        # درخواست‌های با اولویت بالاتر زودتر از صف برداشته می‌شوند
+        self.pool.start(QueryTask(self, channel, generation, func, args), priority)
+        return generation
+
+    def cancel(self, channel):
+        # درخواست در جریان این کانال دیگر تحویل داده نمی‌شود
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        self.callbacks.pop((channel, generation - 1), None)
+        return generation
+
+    def pending(self, channel):
+        return (channel, self.generations.get(channel)) in self.callbacks
+
+    def is_current(self, channel, generation):
+        return self.generations.get(channel) == generation
+
+    def wait(self):
+        self.pool.waitForDone()
+
+    def _on_finished(self, channel, generation, result):
+        on_result, _ = self.callbacks.pop((channel, generation), (None, None))
+        if on_result is not None and self.is_current(channel, generation):
+            on_result(result)
+
+    def _on_failed(self, channel, generation, error):
+        _, on_error = self.callbacks.pop((channel, generation), (None, None))
+        if not self.is_current(channel, generation):
+            return
+        if on_error is not None:
+            on_error(error)
+            return
+        log.error("query %s failed", channel, exc_info=error)
+        if self.on_error is not None:
+            self.on_error(channel, error)
+
+
+class WriteQueue(QObject):
+    # نوشتن با تاخیر: تغییرات کوچک (تیک زدن، ویرایش) بلافاصله در رابط کاربری نمایش داده و اینجا جمع می‌شوند.
+    # تغییرات پشت‌سرهم یک تسک با هم ادغام و همه پس از delay میلی‌ثانیه با یک تراکنش نوشته می‌شوند
+    # (تغییرات، خطا) — تغییراتی که نوشتنشان شکست خورد
+    failed = pyqtSignal(object, object)
+    # تغییراتی که با موفقیت نوشته شدند
+    flushed = pyqtSignal(object)
+
+    def __init__(self, apply, parent=None, delay=300):
+        super().__init__(parent)
+        # apply(changes) با changes به شکل شناسه -> {ستون: مقدار}
+        self.apply = apply
+        self.pending = {}
+        # خطای آخرین نوشتن ناموفق
+        self.error = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.flush)
+
+    def put(self, todo_id, **values):
+        self.pending.setdefault(todo_id, {}).update(values)
+        # زمان از اولین تغییر شمرده می‌شود تا تیک زدن پیوسته نوشتن را بی‌نهایت عقب نیندازد
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self, retain=False):
+        # نوشتن فوری تغییرات در صف؛ False یعنی نوشتن شکست خورد و failed ارسال شد.
+        # با retain تغییرات ناموفق (زیر تغییرات جدیدتر) به صف برمی‌گردند تا بعدا دوباره نوشته شوند
+        self.timer.stop()
+        if not self.pending:
+            return True
+        changes, self.pending = self.pending, {}
+        try:
+            with TRACER.span("flush writes", "app", rows=len(changes)):
+                self.apply(changes)
+        except Exception as e:
+            self.error = e
+            if retain:
+                for todo_id, values in changes.items():
+                    self.pending[todo_id] = {**values, **self.pending.get(todo_id, {})}
+            self.failed.emit(changes, e)
+            return False
+        self.flushed.emit(changes)
+        return True